@@ -0,0 +1,58 @@
+"""Сравнение способов вывести счётчики комментариев на странице списка.
+
+- annotate: Count('comments') по всему опубликованному списку
+  до LIMIT, как было в представлениях изначально;
+- page: страница постов и один сгруппированный COUNT по её постам
+  (blog.views.attach_comment_counts);
+- column: хранимый Post.comment_count.
+
+Запуск: python benchmarks/comment_counts.py --posts 100000 --comments 1000000
+"""
+
+import json
+
+from common import base_parser, measure, seed, setup_django
+
+
+def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--page', type=int, default=1,
+                        help='Номер замеряемой страницы списка.')
+    args = parser.parse_args()
+    setup_django(args.db)
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments)
+
+    from django.db.models import Count
+
+    from blog.models import Post
+    from blog.views import INDEX_POST_LIMIT, attach_comment_counts
+
+    offset = (args.page - 1) * INDEX_POST_LIMIT
+    page = slice(offset, offset + INDEX_POST_LIMIT)
+    posts = Post.objects.published().for_cards()
+
+    def annotate():
+        return list(
+            posts.defer('comment_count')
+            .annotate(comments_total=Count('comments'))[page]
+        )
+
+    def per_page():
+        page_posts = list(posts.defer('comment_count')[page])
+        attach_comment_counts(page_posts)
+        return page_posts
+
+    def column():
+        return list(posts[page])
+
+    results = {
+        name: measure(func, args.repeat)
+        for name, func in (('annotate', annotate), ('page', per_page),
+                           ('column', column))
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Рендеринг комментариев поста: фильтр linebreaksbr против хранимого
+text_html.
+
+- filter: text_html пуст, шаблон прогоняет каждый комментарий через
+  linebreaksbr, как было раньше;
+- stored: шаблон выводит готовый Comment.text_html.
+
+Замеряется рендеринг includes/comments.html со всеми комментариями
+поста и страница поста целиком (первая порция комментариев) без кеша
+страниц.
+
+Запуск: python benchmarks/comment_html.py --post-comments 2000
+"""
+
+import json
+
+from common import base_parser, measure, seed, setup_django
+
+
+def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.set_defaults(posts=100, comments=0)
+    parser.add_argument('--post-comments', type=int, default=2000,
+                        help='Сколько комментариев у замеряемого поста.')
+    args = parser.parse_args()
+    setup_django(args.db)
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments)
+
+    from django.contrib.auth import get_user_model
+    from django.template.loader import render_to_string
+    from django.test import Client, override_settings
+
+    from blog.models import Comment, Post, render_text_html
+
+    post = Post.objects.published().first()
+    author = get_user_model().objects.first()
+    text = '\n'.join(['Строка комментария с <разметкой> & амперсандом.'] * 5)
+    Comment.objects.filter(post=post).delete()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=author, text=f'{i}. {text}')
+        for i in range(args.post_comments)
+    )
+    comments = Comment.objects.filter(post=post).select_related('author')
+    client = Client()
+
+    def render_fragment():
+        return render_to_string('includes/comments.html', {
+            'post': post,
+            'comments': list(comments),
+            'comments_fragment': True,
+        })
+
+    def get_detail():
+        with override_settings(ALLOWED_HOSTS=['testserver'],
+                               BLOG_PAGE_CACHE={'ENABLED': False}):
+            return client.get(f'/posts/{post.pk}/')
+
+    assert get_detail().status_code == 200
+    results = {}
+    for mode in ('filter', 'stored'):
+        if mode == 'filter':
+            comments.update(text_html='')
+        else:
+            for comment in comments:
+                comment.text_html = render_text_html(comment.text)
+            Comment.objects.bulk_update(comments, ['text_html'])
+        results[mode] = {
+            'fragment': measure(render_fragment, args.repeat),
+            'detail': measure(get_detail, args.repeat),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Общая подготовка окружения для бенчмарков.
+
+Бенчмарки работают с отдельной SQLite-базой (по умолчанию временной),
+чтобы не трогать db.sqlite3 разработчика. Базу можно сохранить через
+--db и переиспользовать между запусками: повторное наполнение
+пропускается, если посты уже есть.
+"""
+
+import argparse
+import atexit
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR / 'blogicum'))
+
+BATCH_SIZE = 5000
+
+
+def base_parser(description: str) -> argparse.ArgumentParser:
+    """Парсер с общими для всех бенчмарков аргументами."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--db', help='Путь к SQLite-базе бенчмарка.')
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--categories', type=int, default=20)
+    parser.add_argument('--locations', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=100_000)
+    parser.add_argument('--comments', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='Сколько раз повторять каждый замер.')
+    return parser
+
+
+def setup_django(db_path: str | None = None,
+                 settings_module: str = 'blogicum.settings') -> Path:
+    """Настраивает Django на базу бенчмарка и применяет миграции."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.conf import settings
+    from django.core.management import call_command
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='blogicum-bench-',
+                                       suffix='.sqlite3')
+        os.close(fd)
+        atexit.register(os.remove, db_path)
+    # Настройки продакшна берут путь к базе из окружения.
+    os.environ['DJANGO_SQLITE_PATH'] = str(db_path)
+    settings.DATABASES['default']['NAME'] = Path(db_path)
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return Path(db_path)
+
+
+def seed(users: int, categories: int, locations: int, posts: int,
+         comments: int, random_seed: int = 0) -> None:
+    """Наполняет базу, если она ещё пуста: пользователи, категории
+    и местоположения создаются через mixer, посты и комментарии —
+    пакетными вставками. Тексты генерирует Faker; чтобы не тратить
+    время на миллион вызовов, они берутся из заранее созданных
+    наборов.
+    """
+    from django.contrib.auth import get_user_model
+    from django.utils import timezone
+    from faker import Faker
+    from mixer.backend.django import mixer
+
+    from blog.models import (Category, Comment, Location, Post,
+                             render_text_html)
+
+    if Post.objects.exists():
+        return
+
+    rng = random.Random(random_seed)
+    fake = Faker('ru_RU')
+    fake.seed_instance(random_seed)
+
+    User = get_user_model()
+    mixer.cycle(users).blend(
+        User, username=mixer.sequence('user{0}'),
+        first_name=fake.first_name, last_name=fake.last_name,
+    )
+    mixer.cycle(categories).blend(
+        Category, title=lambda: fake.sentence(nb_words=2)[:-1],
+        description=fake.paragraph, slug=mixer.sequence('category-{0}'),
+        is_published=mixer.sequence(lambda i: i % 10 != 0),
+    )
+    mixer.cycle(locations).blend(
+        Location, name=fake.city, is_published=True,
+    )
+    user_ids = list(User.objects.values_list('id', flat=True))
+    category_ids = list(Category.objects.values_list('id', flat=True))
+    location_ids = list(Location.objects.values_list('id', flat=True))
+
+    # bulk_create не вызывает Post.save(), поэтому вычисляемые поля
+    # заполняются здесь и в refresh_visibility() ниже.
+    titles = [fake.sentence(nb_words=4)[:-1] for _ in range(1000)]
+    texts = []
+    for _ in range(300):
+        text = '\n'.join(fake.paragraphs(nb=rng.randint(1, 6)))
+        texts.append((text, Post(text=text).make_excerpt(),
+                      render_text_html(text)))
+    comment_texts = [
+        (text, render_text_html(text))
+        for text in (fake.paragraph(nb_sentences=rng.randint(1, 4))
+                     for _ in range(2000))
+    ]
+
+    now = timezone.now()
+    Post.objects.bulk_create(
+        (
+            Post(
+                title=rng.choice(titles),
+                text=text,
+                excerpt=excerpt,
+                text_html=text_html,
+                # Несколько постов запланированы на будущее.
+                pub_date=now - timedelta(minutes=i - posts // 100),
+                is_published=i % 20 != 0,
+                author_id=rng.choice(user_ids),
+                category_id=rng.choice(category_ids),
+                location_id=rng.choice(location_ids + [None]),
+            )
+            for i, (text, excerpt, text_html)
+            in ((i, rng.choice(texts)) for i in range(posts))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Post.objects.refresh_visibility()
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(text=text, text_html=text_html,
+                    author_id=rng.choice(user_ids),
+                    post_id=rng.choice(post_ids))
+            for text, text_html
+            in (rng.choice(comment_texts) for _ in range(comments))
+        ),
+        batch_size=BATCH_SIZE,
+    )
+    Post.objects.recount_comments()
+
+
+def measure(func: Callable[[], object], repeat: int) -> dict[str, float]:
+    """Замеряет функцию repeat раз и возвращает перцентили в мс."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return summarize(timings)
+
+
+def summarize(timings: list[float]) -> dict[str, float]:
+    """Перцентили p50/p95/p99 и среднее по замерам в мс."""
+    n = len(timings)
+    timings = sorted(timings) * (2 if n < 2 else 1)
+
+    def percentile(p: float) -> float:
+        return statistics.quantiles(timings, n=100)[p - 1]
+
+    return {
+        'n': n,
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(percentile(95), 3),
+        'p99_ms': round(percentile(99), 3),
+    }
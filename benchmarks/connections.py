@@ -0,0 +1,100 @@
+"""Время ответа WSGI-приложения с новым соединением на каждый запрос
+и с постоянными соединениями.
+
+- no_reuse: CONN_MAX_AGE=0, соединение открывается и закрывается
+  на каждом запросе, как в settings.py;
+- reuse: CONN_MAX_AGE и CONN_HEALTH_CHECKS из settings_production.py;
+- reuse_warm: то же с прогревом новых соединений
+  (BLOG_WARM_UP_CONNECTIONS, blog/warmup.py).
+
+Запросы идут напрямую в blogicum.wsgi.application, а не через тестовый
+клиент: он отключает закрытие соединений по сигналам запроса, и
+CONN_MAX_AGE не действовал бы. Кеш страниц выключен, база открыта
+с OPTIONS из settings_production.py. Кроме перцентилей по страницам
+печатается время первого запроса после открытия соединения.
+
+Запуск: python benchmarks/connections.py --posts 10000 --comments 100000
+"""
+
+import importlib
+import io
+import json
+import os
+import time
+from wsgiref.util import setup_testing_defaults
+
+from common import base_parser, measure, seed, setup_django
+
+
+def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.set_defaults(posts=10_000, comments=100_000, repeat=200)
+    args = parser.parse_args()
+    setup_django(args.db)
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments)
+
+    from django.db import connections
+    from django.test import override_settings
+
+    from blog.models import Category, Post
+    from blogicum.wsgi import application
+
+    os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+    production = importlib.import_module('blogicum.settings_production')
+    production_db = production.DATABASES['default']
+    connections.close_all()
+    connections.settings['default']['OPTIONS'] = production_db['OPTIONS']
+
+    post = Post.objects.published().first()
+    category = Category.objects.filter(is_published=True).first()
+    urls = {
+        'index': '/',
+        'post_detail': f'/posts/{post.pk}/',
+        'category_posts': f'/category/{category.slug}/',
+    }
+
+    def get(path: str) -> None:
+        environ = {'PATH_INFO': path, 'wsgi.input': io.BytesIO()}
+        setup_testing_defaults(environ)
+        statuses = []
+        response = application(
+            environ, lambda status, headers: statuses.append(status)
+        )
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        assert statuses[0].startswith('200'), statuses[0]
+
+    modes = {
+        'no_reuse': (0, False, False),
+        'reuse': (production_db['CONN_MAX_AGE'],
+                  production_db['CONN_HEALTH_CHECKS'], False),
+        'reuse_warm': (production_db['CONN_MAX_AGE'],
+                       production_db['CONN_HEALTH_CHECKS'], True),
+    }
+    results = {}
+    for mode, (max_age, health_checks, warm_up) in modes.items():
+        connections.close_all()
+        connections.settings['default']['CONN_MAX_AGE'] = max_age
+        connections.settings['default']['CONN_HEALTH_CHECKS'] = health_checks
+        with override_settings(ALLOWED_HOSTS=['127.0.0.1'],
+                               BLOG_PAGE_CACHE={'ENABLED': False},
+                               BLOG_WARM_UP_CONNECTIONS=warm_up):
+            start = time.perf_counter()
+            get(urls['index'])
+            results[mode] = {
+                'first_request_ms': round(
+                    (time.perf_counter() - start) * 1000, 3
+                ),
+                **{
+                    name: measure(lambda: get(url), args.repeat)
+                    for name, url in urls.items()
+                },
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,302 @@
+"""Нагрузочный прогон WSGI-приложения: пул потоков в одном процессе
+шлёт в blogicum.wsgi.application запросы к страницам из blog/urls.py
+и pages/urls.py в заданной пропорции.
+
+Смесь (вес, доля запросов от авторизованных пользователей):
+- главная, её вторая страница и страница по курсору;
+- страница поста и подгрузка комментариев;
+- категория и профиль;
+- статические страницы;
+- формы создания поста и редактирования профиля (GET);
+- добавление комментария (POST).
+Редактирование и удаление постов и комментариев в смесь не входят:
+они меняют данные, на которых держится остальная смесь.
+
+Печатается JSON с общей пропускной способностью и по каждой странице
+числом запросов, запросами в секунду, p50/p95/p99 и ошибками. Его
+удобно сохранить через --out и сравнивать между прогонами.
+По умолчанию приложение работает с settings_production.py.
+
+Запуск: python benchmarks/load.py --db bench.sqlite3 --threads 8
+        --requests 20000 --out load.json
+"""
+
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from urllib.parse import urlencode
+
+from common import base_parser, seed, setup_django, summarize
+
+SETTINGS = {
+    'production': 'blogicum.settings_production',
+    'dev': 'blogicum.settings',
+}
+HOST = 'testserver'
+CSRF_TOKEN = 'b' * 32
+
+
+def parse_args():
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.add_argument('--settings', choices=SETTINGS,
+                        default='production')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=10_000,
+                        help='Сколько запросов отправить за прогон.')
+    parser.add_argument('--warmup', type=int, default=200,
+                        help='Сколько запросов отправить до замера.')
+    parser.add_argument('--logged-in', type=float, default=0.2,
+                        help='Доля запросов от авторизованных '
+                             'пользователей.')
+    parser.add_argument('--no-page-cache', action='store_true',
+                        help='Выключить кеш страниц blog.cache.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Зерно генератора данных и смеси запросов.')
+    parser.add_argument('--out', help='Куда сохранить JSON с результатом.')
+    return parser.parse_args()
+
+
+def create_sessions(users) -> list[str]:
+    """Сессии входа для пользователей users, возвращает их ключи."""
+    from django.conf import settings
+    from django.contrib.auth import (BACKEND_SESSION_KEY, HASH_SESSION_KEY,
+                                     SESSION_KEY)
+
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    session_keys = []
+    for user in users:
+        session = SessionStore()
+        session.update({
+            SESSION_KEY: str(user.pk),
+            BACKEND_SESSION_KEY: settings.AUTHENTICATION_BACKENDS[0],
+            HASH_SESSION_KEY: user.get_session_auth_hash(),
+        })
+        session.save()
+        session_keys.append(session.session_key)
+    return session_keys
+
+
+def comment_cursors() -> list[tuple[int, str]]:
+    """Посты с комментариями больше первой порции и курсоры
+    на их вторую порцию.
+    """
+    from blog.models import Comment, Post
+    from blog.paginators import encode_cursor
+
+    commented = (
+        Post.objects.published().filter(comment_count__gt=50)
+        .values_list('pk', flat=True)[:100]
+    )
+    return [
+        (pk, encode_cursor(Comment.objects.filter(post_id=pk)
+                           .order_by('created_at', 'id')[49],
+                           'created_at'))
+        for pk in commented
+    ]
+
+
+def build_mix(rng: random.Random, usernames: list[str]) -> dict:
+    """Смесь запросов: {имя: (вес, функция пути, метод, только для
+    авторизованных)}.
+    """
+    from blog.models import Category, Post
+    from blog.paginators import encode_cursor
+
+    posts = Post.objects.published()
+    post_ids = list(posts.values_list('pk', flat=True)[:1000])
+    old_posts = list(posts.order_by('pub_date').values_list('pk',
+                                                            flat=True)[:200])
+    index_cursor = encode_cursor(posts.order_by('-pub_date', '-id')[99])
+    slugs = list(Category.objects.filter(is_published=True)
+                 .values_list('slug', flat=True))
+    cursors = comment_cursors()
+
+    def post_comments():
+        pk, cursor = rng.choice(cursors)
+        return f'/posts/{pk}/comments/?{urlencode({"after": cursor})}'
+
+    mix = {
+        'blog:index': (25, lambda: '/', 'GET', False),
+        'blog:index page=2': (4, lambda: '/?page=2', 'GET', False),
+        'blog:index after': (2, lambda: f'/?after={index_cursor}',
+                             'GET', False),
+        'blog:post_detail': (25, lambda: f'/posts/{rng.choice(post_ids)}/',
+                             'GET', False),
+        'blog:post_detail old': (5, lambda: (
+            f'/posts/{rng.choice(old_posts)}/'
+        ), 'GET', False),
+        'blog:category_posts': (12, lambda: (
+            f'/category/{rng.choice(slugs)}/'
+        ), 'GET', False),
+        'blog:profile': (10, lambda: f'/profile/{rng.choice(usernames)}/',
+                         'GET', False),
+        'pages:about': (2, lambda: '/pages/about/', 'GET', False),
+        'pages:rules': (2, lambda: '/pages/rules/', 'GET', False),
+        'blog:create_post': (2, lambda: '/posts/create/', 'GET', True),
+        'blog:edit_profile': (1, lambda: '/profile/edit/', 'GET', True),
+        'blog:add_comment': (3, lambda: (
+            f'/posts/{rng.choice(post_ids)}/comment/'
+        ), 'POST', True),
+    }
+    if cursors:
+        mix['blog:post_comments'] = (5, post_comments, 'GET', False)
+    return mix
+
+
+def call(application, name: str, path: str, method: str,
+         session_key: str | None) -> tuple[str, float, int]:
+    """Передаёт запрос в WSGI-приложение, возвращает имя, время
+    ответа в мс и код ответа.
+    """
+    from django.conf import settings
+
+    path, _, query = path.partition('?')
+    body = b''
+    cookies = [f'csrftoken={CSRF_TOKEN}']
+    if session_key:
+        cookies.append(f'{settings.SESSION_COOKIE_NAME}={session_key}')
+    if method == 'POST':
+        body = urlencode({
+            'csrfmiddlewaretoken': CSRF_TOKEN,
+            'text': f'Комментарий нагрузочного прогона {time.time()}',
+        }).encode()
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'HTTP_COOKIE': '; '.join(cookies),
+        'HTTP_REFERER': f'https://{HOST}/',
+        'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'https',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    statuses = []
+    start = time.perf_counter()
+    response = application(
+        environ, lambda status, headers: statuses.append(status)
+    )
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    elapsed = (time.perf_counter() - start) * 1000
+    return name, elapsed, int(statuses[0].split()[0])
+
+
+def run(application, count: int, threads: int,
+        next_request: Callable[[], tuple]) -> tuple[dict, dict, float]:
+    """Отправляет в application count запросов из threads потоков."""
+    timings = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for name, elapsed, status in executor.map(
+            lambda request: call(application, *request),
+            (next_request() for _ in range(count)),
+        ):
+            timings[name].append(elapsed)
+            statuses[name][status] += 1
+    return timings, statuses, time.perf_counter() - start
+
+
+def report(args, timings: dict, statuses: dict, wall: float) -> dict:
+    """Итог прогона: общая пропускная способность и по страницам."""
+    all_timings = [ms for values in timings.values() for ms in values]
+    return {
+        'settings': args.settings,
+        'page_cache': not args.no_page_cache,
+        'threads': args.threads,
+        'requests': args.requests,
+        'seconds': round(wall, 3),
+        'throughput_rps': round(args.requests / wall, 1),
+        'latency': summarize(all_timings),
+        'views': {
+            name: {
+                **summarize(timings[name]),
+                'rps': round(len(timings[name]) / wall, 1),
+                'statuses': dict(sorted(statuses[name].items())),
+                'errors': sum(
+                    count for status, count in statuses[name].items()
+                    if status >= 500
+                ),
+            }
+            for name in sorted(timings)
+        },
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    tmp_dir = tempfile.TemporaryDirectory(prefix='blogicum-load-')
+    os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_ALLOWED_HOSTS', HOST)
+    os.environ.setdefault('DJANGO_CACHE_DIR', tmp_dir.name)
+    os.environ.setdefault('DJANGO_SLOW_QUERY_LOG',
+                          os.path.join(tmp_dir.name, 'slow_queries.log'))
+    setup_django(args.db, SETTINGS[args.settings])
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments, args.seed)
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+
+    from blogicum.wsgi import application
+
+    logging.getLogger('blogicum.server_timing').setLevel(logging.WARNING)
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, HOST]
+    if args.no_page_cache:
+        settings.BLOG_PAGE_CACHE = {
+            **settings.BLOG_PAGE_CACHE, 'ENABLED': False
+        }
+
+    rng = random.Random(args.seed)
+    users = list(get_user_model().objects.order_by('pk')[:50])
+    session_keys = create_sessions(users[:20])
+    mix = build_mix(rng, [user.username for user in users])
+    names = list(mix)
+    weights = [mix[name][0] for name in names]
+    rng_lock = threading.Lock()
+
+    def next_request() -> tuple[str, str, str, str | None]:
+        with rng_lock:
+            name = rng.choices(names, weights)[0]
+            _, path, method, login_required = mix[name]
+            session_key = (
+                rng.choice(session_keys)
+                if login_required or rng.random() < args.logged_in
+                else None
+            )
+            return name, path(), method, session_key
+
+    run(application, args.warmup, args.threads, next_request)
+    results = report(args, *run(application, args.requests, args.threads,
+                                next_request))
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as file:
+            file.write(output)
+    print(output)
+    tmp_dir.cleanup()
+
+
+if __name__ == '__main__':
+    main()
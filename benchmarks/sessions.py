@@ -0,0 +1,71 @@
+"""Страницы авторизованного пользователя с разными бэкендами сессий.
+
+- db: сессия читается из SQLite на каждом запросе (settings.py);
+- cached_db: сессия читается из кеша, в базу пишется только при
+  входе (settings_production.py по умолчанию);
+- signed_cookies: сессия в подписанной куке, к базе не обращается.
+
+Для каждого бэкенда замеряются вход (force_login: запись сессии и
+last_login) и главная страница с включённым кешем страниц, плюс число
+запросов к таблице сессий на одну страницу и пропускная способность
+в запросах в секунду по среднему времени.
+
+Запуск: python benchmarks/sessions.py --posts 10000 --comments 0
+"""
+
+import json
+
+from common import base_parser, measure, seed, setup_django
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.set_defaults(posts=10_000, comments=0, repeat=200)
+    args = parser.parse_args()
+    setup_django(args.db)
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments)
+
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    user = get_user_model().objects.first()
+    results = {}
+    for name, engine in ENGINES.items():
+        with override_settings(ALLOWED_HOSTS=['testserver'],
+                               SESSION_ENGINE=engine):
+            client = Client()
+
+            def get_index():
+                response = client.get('/')
+                assert response.status_code == 200
+                return response
+
+            client.force_login(user)
+            get_index()
+            with CaptureQueriesContext(connection) as ctx:
+                get_index()
+            page = measure(get_index, args.repeat)
+            results[name] = {
+                'login': measure(lambda: client.force_login(user),
+                                 args.repeat),
+                'page': page,
+                'page_rps': round(1000 / page['mean_ms'], 1),
+                'session_queries': sum(
+                    'django_session' in query['sql']
+                    for query in ctx.captured_queries
+                ),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
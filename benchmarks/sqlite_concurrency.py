@@ -0,0 +1,151 @@
+"""Конкурентные чтение и запись SQLite без настройки и с PRAGMA из
+settings_production.py.
+
+- default: журнал отката (journal_mode=DELETE), настройки SQLite
+  по умолчанию;
+- tuned: OPTIONS базы из settings_production.py (WAL,
+  synchronous=NORMAL, busy_timeout, mmap и т.д.).
+
+Читатели в --readers потоках выбирают первую страницу главной
+(посты для карточек и их количество), писатели в --writers потоках
+создают комментарии в транзакции, как CommentCreateView. Для каждого
+режима печатаются перцентили чтения и записи, число операций и ошибок
+"database is locked".
+
+Запуск: python benchmarks/sqlite_concurrency.py --readers 8 --writers 2
+"""
+
+import importlib
+import json
+import os
+import threading
+import time
+from functools import partial
+
+from common import base_parser, seed, setup_django, summarize
+
+
+def read(i: int) -> None:
+    """Первая страница главной: посты для карточек и их количество."""
+    from blog.models import Post
+    from blog.views import INDEX_POST_LIMIT
+
+    posts = Post.objects.published()
+    list(posts.for_cards()[:INDEX_POST_LIMIT])
+    posts.count()
+
+
+def write(post_ids: list[int], author, i: int) -> None:
+    """Комментарий в транзакции, как в CommentCreateView."""
+    from django.db import transaction
+
+    from blog.models import Comment
+
+    with transaction.atomic():
+        Comment.objects.create(
+            post_id=post_ids[i % len(post_ids)], author=author,
+            text=f'Комментарий {i}',
+        )
+
+
+def worker(operation, deadline: float, timings: list[float],
+           errors: list[str]) -> None:
+    from django.db import OperationalError, connection
+
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                operation(i)
+            except OperationalError as error:
+                errors.append(str(error))
+            else:
+                timings.append((time.perf_counter() - start) * 1000)
+            i += 1
+    finally:
+        connection.close()
+
+
+def run_mode(options: dict, operations: dict, seconds: float) -> dict:
+    """Запускает потоки операций {вид: (функция, число потоков)} на
+    seconds секунд с OPTIONS базы options.
+    """
+    from django.db import connection, connections
+
+    from blog.models import Post
+
+    connections.close_all()
+    connections.settings['default']['OPTIONS'] = options
+    # Первое соединение переключает режим журнала до старта потоков.
+    Post.objects.exists()
+    connection.close()
+
+    timings = {kind: [] for kind in operations}
+    errors = {kind: [] for kind in operations}
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(operation, deadline, timings[kind], errors[kind]),
+        )
+        for kind, (operation, count) in operations.items()
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        kind: {
+            **(summarize(timings[kind]) if timings[kind] else {'n': 0}),
+            'locked_errors': sum(
+                'locked' in error for error in errors[kind]
+            ),
+            'other_errors': sum(
+                'locked' not in error for error in errors[kind]
+            ),
+        }
+        for kind in operations
+    }
+
+
+def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.set_defaults(posts=10_000, comments=0)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=5,
+                        help='Длительность замера каждого режима.')
+    args = parser.parse_args()
+    setup_django(args.db)
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments)
+
+    from django.contrib.auth import get_user_model
+
+    from blog.models import Post
+
+    os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+    production = importlib.import_module('blogicum.settings_production')
+    modes = {
+        'default': {'init_command': 'PRAGMA journal_mode=DELETE'},
+        'tuned': production.DATABASES['default']['OPTIONS'],
+    }
+    author = get_user_model().objects.first()
+    post_ids = list(
+        Post.objects.published().values_list('pk', flat=True)[:100]
+    )
+    operations = {
+        'read': (read, args.readers),
+        'write': (partial(write, post_ids, author), args.writers),
+    }
+    results = {
+        mode: run_mode(options, operations, args.seconds)
+        for mode, options in modes.items()
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
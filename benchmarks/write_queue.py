@@ -0,0 +1,100 @@
+"""Вставка комментариев из многих потоков: каждый поток пишет сам
+против очереди с одним потоком-писателем (blog/write_queue.py).
+
+- direct: run_write с выключенной очередью, каждая вставка своей
+  транзакцией в потоке запроса, как раньше в CommentCreateView;
+- queue: run_write через очередь, писатель пачками коммитит
+  накопившиеся вставки.
+
+Печатаются перцентили времени ответа run_write, вставки в секунду
+и число ошибок "database is locked". С --tuned база открывается
+с OPTIONS из settings_production.py (WAL и т.д.).
+
+Запуск: python benchmarks/write_queue.py --threads 16 --seconds 5
+"""
+
+import importlib
+import json
+import os
+import threading
+import time
+
+from common import base_parser, seed, setup_django, summarize
+
+
+def main() -> None:
+    parser = base_parser(__doc__.splitlines()[0])
+    parser.set_defaults(posts=1000, comments=0)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5,
+                        help='Длительность замера каждого режима.')
+    parser.add_argument('--tuned', action='store_true',
+                        help='Открывать базу с PRAGMA из продакшна.')
+    args = parser.parse_args()
+    setup_django(args.db)
+    seed(args.users, args.categories, args.locations, args.posts,
+         args.comments)
+
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError, connection, connections
+    from django.test import override_settings
+
+    from blog.models import Comment, Post
+    from blog.write_queue import get_write_queue, run_write
+
+    if args.tuned:
+        os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark')
+        production = importlib.import_module('blogicum.settings_production')
+        connections.close_all()
+        connections.settings['default']['OPTIONS'] = (
+            production.DATABASES['default']['OPTIONS']
+        )
+    author = get_user_model().objects.first()
+    post_ids = list(
+        Post.objects.published().values_list('pk', flat=True)[:100]
+    )
+
+    def worker(deadline: float, timings: list[float],
+               errors: list[str]) -> None:
+        i = 0
+        try:
+            while time.perf_counter() < deadline:
+                comment = Comment(post_id=post_ids[i % len(post_ids)],
+                                  author=author, text=f'Комментарий {i}')
+                start = time.perf_counter()
+                try:
+                    run_write(comment.save)
+                except OperationalError as error:
+                    errors.append(str(error))
+                else:
+                    timings.append((time.perf_counter() - start) * 1000)
+                i += 1
+        finally:
+            connection.close()
+
+    results = {}
+    for mode, enabled in (('direct', False), ('queue', True)):
+        timings, errors = [], []
+        with override_settings(BLOG_WRITE_QUEUE={'ENABLED': enabled}):
+            deadline = time.perf_counter() + args.seconds
+            threads = [
+                threading.Thread(target=worker,
+                                 args=(deadline, timings, errors))
+                for _ in range(args.threads)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            get_write_queue().stop()
+        results[mode] = {
+            **(summarize(timings) if timings else {'n': 0}),
+            'inserts_per_second': round(len(timings) / args.seconds, 1),
+            'locked_errors': sum('locked' in error for error in errors),
+            'other_errors': sum('locked' not in error for error in errors),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
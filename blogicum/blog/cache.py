@@ -0,0 +1,337 @@
+"""Кеш страниц и HTML карточек постов.
+
+Страница кешируется по пути и строке запроса вместе с тегами
+объектов, которые на ней выведены ("post:1", "category:2",
+"post-list"...), и временем начала её рендеринга. Сигналы моделей
+записывают в кеш время сброса тегов. Страница отдаётся из кеша, пока
+все её теги сброшены раньше, чем она начала рендериться: запись,
+зафиксированная во время рендеринга, тоже делает страницу устаревшей.
+
+Одна закешированная страница отдаётся всем пользователям. Зависящие
+от пользователя части (шапка, форма комментария, кнопки автора)
+выводятся тегом {% hole %}: при рендеринге для кеша вместо них
+в страницу попадают метки, а сами части рендерятся из небольших
+шаблонов и подставляются на каждом запросе.
+
+Карточка поста одинакова для всех пользователей и кешируется
+отдельно под ключом с Post.updated_at: его обновляют сохранение
+поста, комментарии и изменения выводимых в карточке категории,
+местоположения и автора.
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Iterable
+from datetime import datetime
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.http import HttpRequest, HttpResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import get_language
+
+PAGE_CACHE_DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    # Списки постов меняются только при правках (их ловят сигналы)
+    # и при наступлении отложенных публикаций, поэтому по умолчанию
+    # хранятся без ограничения по времени.
+    'LIST_TIMEOUT': None,
+    # HTML карточек постов. Ключ меняется вместе с постом, поэтому
+    # timeout нужен только чтобы вытеснять устаревшие версии.
+    'CARD_TIMEOUT': 24 * 60 * 60,
+}
+HOLE_MARK = '<!--page-cache-hole:{}-->'
+HOLE_MARK_RE = re.compile(rb'<!--page-cache-hole:(\d+)-->')
+
+Validators = tuple[str | None, datetime | None]
+
+
+def page_cache_settings() -> dict:
+    """Настройки кеша страниц с учётом settings.BLOG_PAGE_CACHE."""
+    return {
+        **PAGE_CACHE_DEFAULTS,
+        **getattr(settings, 'BLOG_PAGE_CACHE', {}),
+    }
+
+
+def get_page_cache() -> BaseCache:
+    return caches[page_cache_settings()['CACHE_ALIAS']]
+
+
+def _tag_key(tag: str) -> str:
+    return f'blog:page-cache:tag:{tag}'
+
+
+def get_tag_versions(tags: Iterable[str],
+                     missing: int | None = None) -> dict[str, int]:
+    """Версии тегов — время их последнего сброса в наносекундах
+    (time.time_ns()). Тегам, которых нет в кеше, записывается missing
+    или текущее время. Страница, которая рендерится для кеша, передаёт
+    время начала рендеринга (request.page_cache_started_at): с новыми
+    тегами она актуальна до их первого сброса.
+    """
+    page_cache = get_page_cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = {
+        keys[key]: version
+        for key, version in page_cache.get_many(keys).items()
+    }
+    for key, tag in keys.items():
+        if tag not in versions:
+            version = time.time_ns() if missing is None else missing
+            page_cache.add(key, version, timeout=None)
+            versions[tag] = page_cache.get(key, version)
+    return versions
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Записывает время сброса тегов: страницы с ними, начатые
+    раньше, перестают браться из кеша.
+    """
+    invalidated_at = time.time_ns()
+    get_page_cache().set_many(
+        {_tag_key(tag): invalidated_at for tag in tags}, timeout=None
+    )
+
+
+def _tags_unchanged_since(tags: Iterable[str], started_at: int) -> bool:
+    """Все теги есть в кеше и сброшены не позже started_at.
+    Вытесненный из кеша тег считается сброшенным.
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    versions = get_page_cache().get_many(keys)
+    return len(versions) == len(keys) and all(
+        version <= started_at for version in versions.values()
+    )
+
+
+def add_page_cache_tags(request: HttpRequest, *tags: str) -> None:
+    """Отмечает объекты, от которых зависит кешируемая страница."""
+    if not hasattr(request, 'page_cache_tags'):
+        request.page_cache_tags = set()
+    request.page_cache_tags.update(tags)
+
+
+def timeout_until(expires_at: datetime | None,
+                  timeout: int | None) -> int | None:
+    """Сокращает timeout так, чтобы запись истекла не позже expires_at."""
+    if expires_at is None:
+        return timeout
+    delay = math.ceil((expires_at - timezone.now()).total_seconds())
+    delay = max(delay, 0)
+    return delay if timeout is None else min(timeout, delay)
+
+
+def set_page_cache_expiry(
+    request: HttpRequest, timeout: int | None,
+    expires_at: Callable[[], datetime | None] | None = None
+) -> None:
+    """Задаёт время жизни кешируемой страницы: timeout секунд, но не
+    дольше момента, который вернёт expires_at. Момент вычисляется,
+    только если страница действительно сохраняется в кеш.
+    """
+    request.page_cache_expiry = (timeout, expires_at)
+
+
+def _page_timeout(request: HttpRequest) -> int | None:
+    timeout, expires_at = getattr(
+        request, 'page_cache_expiry',
+        (page_cache_settings()['TIMEOUT'], None)
+    )
+    if expires_at is None:
+        return timeout
+    return timeout_until(expires_at(), timeout)
+
+
+def post_cache_tags(post) -> tuple[str, ...]:
+    """Теги поста и выведенных вместе с ним связанных объектов."""
+    return (
+        f'post:{post.pk}',
+        f'user:{post.author_id}',
+        f'category:{post.category_id}',
+        f'location:{post.location_id}',
+    )
+
+
+def post_card_cache_key(post) -> str:
+    """Ключ HTML карточки поста, меняющийся при любом её изменении."""
+    return (
+        f'blog:card:{get_language()}:{post.pk}:'
+        f'{post.updated_at.timestamp()}:{post.comment_count}'
+    )
+
+
+# Счётчики попаданий и промахов ведутся в памяти процесса: запись
+# в общий кеш на каждом запросе стоила бы дороже самого попадания.
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def page_cache_stats() -> dict[str, int]:
+    """Количество попаданий и промахов кеша страниц в этом процессе."""
+    with _stats_lock:
+        return {'hits': _stats['hits'], 'misses': _stats['misses']}
+
+
+def reset_page_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+
+def _page_key(request: HttpRequest) -> str:
+    full_path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'blog:page-cache:page:{full_path}'
+
+
+def render_hole(request: HttpRequest | None, template_name: str,
+                context: dict) -> str:
+    """Рендерит зависящую от пользователя часть страницы. Если
+    страница рендерится для кеша, вместо неё возвращает метку,
+    а шаблон и контекст запоминает для подстановки.
+    """
+    holes = getattr(request, 'page_cache_holes', None)
+    if holes is None:
+        return render_to_string(template_name, context, request)
+    holes.append((template_name, context))
+    return HOLE_MARK.format(len(holes) - 1)
+
+
+def _fill_holes(request: HttpRequest, response: HttpResponse,
+                holes: list[tuple[str, dict]]) -> HttpResponse:
+    if holes:
+        response.content = HOLE_MARK_RE.sub(
+            lambda match: render_to_string(
+                *holes[int(match.group(1))], request
+            ).encode(response.charset),
+            response.content,
+        )
+    return response
+
+
+def personal_validators(request: HttpRequest,
+                        validators: Validators) -> Validators:
+    """Валидаторы условного запроса для пользователя: страница с
+    подставленными частями у каждого своя, поэтому ETag включает
+    пользователя, а Last-Modified отдаётся только анонимным.
+    """
+    etag, last_modified = validators
+    if etag is not None:
+        etag = hashlib.md5(f'{etag}|{request.user.pk}'.encode()).hexdigest()
+    if request.user.is_authenticated:
+        last_modified = None
+    return etag, last_modified
+
+
+def _not_modified(request: HttpRequest, response: HttpResponse,
+                  validators: Validators | None) -> HttpResponse | None:
+    """Ставит закешированной странице валидаторы пользователя и
+    возвращает 304, если страница у клиента не изменилась.
+    """
+    if validators is None:
+        return None
+    etag, last_modified = personal_validators(request, validators)
+    if etag is not None:
+        etag = quote_etag(etag)
+        response.headers['ETag'] = etag
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+        response.headers['Last-Modified'] = http_date(last_modified)
+    conditional = get_conditional_response(
+        request, etag=etag, last_modified=last_modified, response=response
+    )
+    return None if conditional is response else conditional
+
+
+def _is_cacheable_request(request: HttpRequest) -> bool:
+    return (
+        page_cache_settings()['ENABLED']
+        and request.method in ('GET', 'HEAD')
+    )
+
+
+def _is_cacheable_response(response: HttpResponse) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    )
+
+
+def _store(request: HttpRequest, response: HttpResponse,
+           holes: list[tuple[str, dict]]) -> None:
+    timeout = _page_timeout(request)
+    if timeout == 0:
+        return
+    tags = tuple(getattr(request, 'page_cache_tags', ()))
+    started_at = request.page_cache_started_at
+    get_tag_versions(tags, missing=started_at)
+    # Валидаторы в заголовках личные, в кеш идут общие.
+    personal_headers = {
+        header: response.headers[header]
+        for header in ('ETag', 'Last-Modified') if header in response
+    }
+    for header in personal_headers:
+        del response.headers[header]
+    validators = getattr(request, 'page_validators', None)
+    get_page_cache().set(
+        _page_key(request),
+        (response, tags, started_at, holes, validators),
+        timeout,
+    )
+    for header, value in personal_headers.items():
+        response.headers[header] = value
+
+
+def cache_shared_page(view: Callable) -> Callable:
+    """Отдаёт страницу из кеша, пока не изменились выведенные на ней
+    объекты. Страница общая для всех пользователей: их собственные
+    части подставляются в неё на каждом запросе.
+    """
+
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        if not _is_cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        cached = get_page_cache().get(_page_key(request))
+        if cached is not None:
+            response, tags, started_at, holes, validators = cached
+            if _tags_unchanged_since(tags, started_at):
+                _count('hits')
+                not_modified = _not_modified(request, response, validators)
+                if not_modified is not None:
+                    return not_modified
+                return _fill_holes(request, response, holes)
+        _count('misses')
+
+        # Время берётся до первого запроса к базе: всё, что
+        # зафиксировано позже, страница могла не увидеть.
+        request.page_cache_started_at = time.time_ns()
+        request.page_cache_holes = holes = []
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            del request.page_cache_holes
+        if request.method == 'GET' and _is_cacheable_response(response):
+            _store(request, response, holes)
+        return _fill_holes(request, response, holes)
+
+    return wrapper
@@ -0,0 +1,67 @@
+"""Проверки настроек блога для manage.py check --deploy."""
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Error, Tags, Warning, register
+
+from .cache import page_cache_settings
+
+# Кеши, содержимое которых видно только одному процессу
+PER_PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+# Кеши, запись в которые дорожает с числом ключей
+SLOW_WRITE_CACHE_BACKENDS = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+)
+
+
+def _page_cache_aliases() -> list[str]:
+    return sorted({page_cache_settings()['CACHE_ALIAS'], DEFAULT_CACHE_ALIAS})
+
+
+def _backend(alias: str) -> str | None:
+    return settings.CACHES.get(alias, {}).get('BACKEND')
+
+
+@register(Tags.caches, deploy=True)
+def check_page_cache_is_shared(app_configs, **kwargs) -> list[Error]:
+    """Кеш страниц со списками без ограничения по времени должен быть
+    общим для процессов: сигналы и планировщик сбрасывают его только
+    в своём процессе.
+    """
+    config = page_cache_settings()
+    if not config['ENABLED'] or config['LIST_TIMEOUT'] is not None:
+        return []
+    return [
+        Error(
+            f'Кеш "{alias}" хранится в памяти процесса, а списки постов '
+            'кешируются без ограничения по времени: изменения из других '
+            'процессов и планировщика publish_scheduled их не сбросят.',
+            hint='Укажите в CACHES общий для процессов бэкенд или задайте '
+                 "BLOG_PAGE_CACHE['LIST_TIMEOUT'].",
+            id='blog.E001',
+        )
+        for alias in _page_cache_aliases()
+        if _backend(alias) in PER_PROCESS_CACHE_BACKENDS
+    ]
+
+
+@register(Tags.caches, deploy=True)
+def check_page_cache_is_fast(app_configs, **kwargs) -> list[Warning]:
+    """Кеш страниц пишется почти на каждом промахе, а файловый кеш
+    при каждой записи перечисляет весь свой каталог.
+    """
+    if not page_cache_settings()['ENABLED']:
+        return []
+    return [
+        Warning(
+            f'Кеш "{alias}" хранится в файлах: каждая запись в него '
+            'перечисляет весь каталог кеша.',
+            hint='Для продакшна укажите в CACHES Redis или Memcached '
+                 '(DJANGO_REDIS_URL в settings_production).',
+            id='blog.W001',
+        )
+        for alias in _page_cache_aliases()
+        if _backend(alias) in SLOW_WRITE_CACHE_BACKENDS
+    ]
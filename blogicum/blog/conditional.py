@@ -0,0 +1,104 @@
+"""Условные GET-запросы к страницам постов и спискам.
+
+Валидаторы ETag и Last-Modified вычисляются одним лёгким запросом
+MAX(updated_at) до вызова view, и при совпадении с заголовками
+If-None-Match или If-Modified-Since клиент получает 304 без
+рендеринга шаблонов. Валидаторы общие для всех пользователей,
+в заголовки они попадают через cache.personal_validators().
+
+Декоратор ставится под cache_shared_page: страница сохраняется
+в кеш вместе с валидаторами, и на повторный запрос 304 отдаётся
+из кеша без обращения к БД.
+"""
+
+import hashlib
+from collections.abc import Callable
+from datetime import datetime
+from functools import wraps
+
+from django.db.models import Max, Subquery
+from django.http import Http404, HttpRequest
+from django.views.decorators.http import condition
+
+from .cache import Validators, get_tag_versions, personal_validators
+from .models import Category, Post
+
+
+def _validators(scope: str, updated_at: datetime | None,
+                *extra: str) -> Validators:
+    raw = '|'.join((
+        scope, updated_at.isoformat() if updated_at else '', *extra,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest(), updated_at
+
+
+def conditional_page(
+    get_validators: Callable[..., Validators]
+) -> Callable:
+    """Декоратор condition() с валидаторами из get_validators.
+    Валидаторы вычисляются один раз на запрос и сохраняются
+    в request.page_validators для кеша страниц.
+    """
+
+    @wraps(get_validators)
+    def validators(request: HttpRequest, *args, **kwargs) -> Validators:
+        if not hasattr(request, 'page_validators'):
+            request.page_validators = get_validators(
+                request, *args, **kwargs
+            )
+        return personal_validators(request, request.page_validators)
+
+    return condition(
+        etag_func=lambda *args, **kwargs: validators(*args, **kwargs)[0],
+        last_modified_func=(
+            lambda *args, **kwargs: validators(*args, **kwargs)[1]
+        ),
+    )
+
+
+def post_updated_at(user, pk: int,
+                    using: str | None = None) -> datetime | None:
+    """Время последнего изменения поста, если он виден пользователю."""
+    return Post.objects.db_manager(using).visible_to(user).filter(
+        pk=pk
+    ).order_by().values_list('updated_at', flat=True).first()
+
+
+def post_validators(request: HttpRequest, pk: int) -> Validators:
+    """Валидаторы страницы поста: время его последнего изменения,
+    включая комментарии и выводимые с ним объекты. Недоступный
+    пользователю пост сразу даёт 404.
+    """
+    updated_at = post_updated_at(request.user, pk)
+    if updated_at is None:
+        raise Http404
+    return _validators(f'post:{pk}', updated_at)
+
+
+def _list_validators(request: HttpRequest, scope: str,
+                     posts) -> Validators:
+    """Валидаторы списка: MAX(updated_at) ловит изменения постов
+    списка, а версия тега post-list — удаление и скрытие постов,
+    которые из MAX не видны.
+    """
+    updated_at = posts.order_by().aggregate(
+        updated_at=Max('updated_at')
+    )['updated_at']
+    list_version = get_tag_versions(
+        ('post-list',),
+        missing=getattr(request, 'page_cache_started_at', None),
+    )['post-list']
+    return _validators(scope, updated_at, str(list_version))
+
+
+def index_validators(request: HttpRequest) -> Validators:
+    return _list_validators(request, 'index', Post.objects.published())
+
+
+def category_validators(request: HttpRequest,
+                        category_slug: str) -> Validators:
+    category = Category.objects.filter(slug=category_slug).values('pk')
+    return _list_validators(
+        request, f'category:{category_slug}',
+        Post.objects.published().filter(category=Subquery(category)),
+    )
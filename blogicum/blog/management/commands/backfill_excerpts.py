@@ -0,0 +1,39 @@
+"""Команда заполнения анонсов постов, созданных до появления поля."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Заполняет Post.excerpt у постов с пустым анонсом.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--all', action='store_true', dest='rebuild_all',
+            help='Пересчитать анонсы всех постов, а не только пустые.'
+        )
+
+    def handle(self, *args, rebuild_all: bool, **options) -> None:
+        posts = Post.objects.only('id', 'text').order_by('pk')
+        if not rebuild_all:
+            posts = posts.filter(excerpt='').exclude(text='')
+        filled = 0
+        batch = []
+        for post in posts.iterator(chunk_size=BATCH_SIZE):
+            post.excerpt = post.make_excerpt()
+            batch.append(post)
+            if len(batch) == BATCH_SIZE:
+                filled += self.save_batch(batch)
+                batch = []
+        filled += self.save_batch(batch)
+        self.stdout.write(f'Заполнено анонсов: {filled}')
+
+    @staticmethod
+    def save_batch(posts: list[Post]) -> int:
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, ['excerpt'])
+        return len(posts)
@@ -0,0 +1,47 @@
+"""Команда заполнения HTML текстов постов и комментариев, созданных
+до появления поля text_html.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+
+from blog.models import Comment, Post, render_text_html
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Заполняет text_html у постов и комментариев с пустым HTML.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--all', action='store_true', dest='rebuild_all',
+            help='Пересчитать HTML всех записей, а не только пустой.'
+        )
+
+    def handle(self, *args, rebuild_all: bool, **options) -> None:
+        for model in (Post, Comment):
+            filled = self.backfill(model, rebuild_all)
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: заполнено {filled}'
+            )
+
+    def backfill(self, model: type[models.Model], rebuild_all: bool) -> int:
+        objects = model.objects.only('id', 'text').order_by('pk')
+        if not rebuild_all:
+            objects = objects.filter(text_html='').exclude(text='')
+        filled = 0
+        batch = []
+        for obj in objects.iterator(chunk_size=BATCH_SIZE):
+            obj.text_html = render_text_html(obj.text)
+            batch.append(obj)
+            if len(batch) == BATCH_SIZE:
+                filled += self.save_batch(model, batch)
+                batch = []
+        return filled + self.save_batch(model, batch)
+
+    @staticmethod
+    def save_batch(model: type[models.Model], objects: list) -> int:
+        with transaction.atomic():
+            model.objects.bulk_update(objects, ['text_html'])
+        return len(objects)
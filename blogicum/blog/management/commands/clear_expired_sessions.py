@@ -0,0 +1,63 @@
+"""Команда удаления истёкших сессий порциями.
+
+Встроенная clearsessions удаляет все истёкшие сессии одним DELETE
+и держит блокировку записи SQLite всё это время, задерживая
+комментарии и входы. Здесь каждая порция удаляется отдельной
+транзакцией, между порциями можно сделать паузу.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истёкшие сессии из базы порциями.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько сессий удалять одной транзакцией.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help='Пауза между порциями в секундах.'
+        )
+
+    def handle(self, *args, batch_size: int, pause: float,
+               **options) -> None:
+        if settings.SESSION_ENGINE not in DB_SESSION_ENGINES:
+            self.stdout.write(
+                'Сессии не хранятся в базе, удалять нечего.'
+            )
+            return
+        now = timezone.now()
+        deleted = 0
+        while True:
+            batch_deleted = self.delete_batch(now, batch_size)
+            deleted += batch_deleted
+            if batch_deleted < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        self.stdout.write(f'Удалено сессий: {deleted}')
+
+    @staticmethod
+    def delete_batch(now, batch_size: int) -> int:
+        with transaction.atomic():
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            return Session.objects.filter(pk__in=keys).delete()[0]
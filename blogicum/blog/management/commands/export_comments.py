@@ -0,0 +1,34 @@
+"""Команда выгрузки комментариев в формате JSON Lines."""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from blog.models import Comment
+
+# Сколько строк за раз читается из курсора БД при выгрузке
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает комментарии построчно в JSON Lines, не загружая '
+        'их все в память.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--post', type=int, help='Выгрузить комментарии одного поста.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        comments = Comment.objects.order_by('id')
+        if options['post'] is not None:
+            comments = comments.filter(post_id=options['post'])
+        rows = comments.values(
+            'id', 'post_id', 'author__username', 'text', 'created_at'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        for row in rows:
+            self.stdout.write(
+                json.dumps(row, ensure_ascii=False, default=str)
+            )
@@ -0,0 +1,109 @@
+"""Планировщик отложенных публикаций.
+
+Флаг Post.is_visible выставляется при сохранении поста, а у постов
+с датой публикации в будущем его выставляет эта команда, когда дата
+наступит. В режиме --loop команда работает постоянно и просыпается
+к ближайшей отложенной публикации, но не реже раза в --interval секунд.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from blog.cache import invalidate_tags
+from blog.models import (NEXT_PUBLICATION_CACHE_KEY, Post,
+                         get_next_publication_at)
+from blog.paginators import invalidate_post_counts
+
+DEFAULT_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Открывает отложенные посты, дата публикации которых наступила.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Работать постоянно, а не завершаться после проверки.'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=DEFAULT_INTERVAL,
+            help='Наибольшая пауза между проверками в режиме --loop, сек.'
+        )
+        parser.add_argument(
+            '--all', action='store_true', dest='recheck_all',
+            help='Пересчитать флаг видимости у всех постов.'
+        )
+
+    def handle(self, *args, loop: bool, interval: float,
+               recheck_all: bool, **options) -> None:
+        if recheck_all:
+            changed = self.repair_visibility()
+            self.stdout.write(f'Исправлено флагов видимости: {changed}')
+        while True:
+            published = self.publish_due_posts()
+            if published or not loop:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not loop:
+                return
+            time.sleep(self.seconds_to_wait(interval))
+
+    def repair_visibility(self) -> int:
+        """Пересчитывает is_visible у всех постов и сбрасывает кеш
+        страниц изменённых постов.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            changed = self.changed_posts(
+                Post.objects.with_stale_visibility(now)
+            )
+            count = Post.objects.refresh_visibility(now)
+        self.invalidate(changed)
+        return count
+
+    def publish_due_posts(self) -> int:
+        """Выставляет is_visible у наступивших отложенных постов."""
+        due = Post.objects.due_for_publication()
+        with transaction.atomic():
+            published = self.changed_posts(due)
+            if not published:
+                return 0
+            due.update(is_visible=True, updated_at=timezone.now())
+        self.invalidate(published)
+        return len(published)
+
+    @staticmethod
+    def changed_posts(posts) -> list[tuple[int, int | None, int]]:
+        return list(
+            posts.order_by().values_list('pk', 'category_id', 'author_id')
+        )
+
+    @staticmethod
+    def invalidate(changed) -> None:
+        """Сбрасывает кеши страниц изменённых постов и списков,
+        в которые они входят.
+        """
+        cache.delete(NEXT_PUBLICATION_CACHE_KEY)
+        invalidate_post_counts()
+        invalidate_tags(
+            'post-list',
+            *{f'post:{pk}' for pk, _, _ in changed},
+            *{
+                f'post-list:category:{category_id}'
+                for _, category_id, _ in changed if category_id
+            },
+            *{f'post-list:author:{author_id}' for _, _, author_id in changed},
+        )
+
+    @staticmethod
+    def seconds_to_wait(interval: float) -> float:
+        next_pub_date = get_next_publication_at()
+        if next_pub_date is None:
+            return interval
+        delay = (next_pub_date - timezone.now()).total_seconds()
+        return min(interval, max(delay, 0))
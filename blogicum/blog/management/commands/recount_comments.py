@@ -0,0 +1,15 @@
+"""Команда пересчёта денормализованных счётчиков комментариев."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает Post.comment_count и исправляет расхождения.'
+
+    def handle(self, *args, **options) -> None:
+        with transaction.atomic():
+            repaired = Post.objects.recount_comments()
+        self.stdout.write(f'Исправлено счётчиков: {repaired}')
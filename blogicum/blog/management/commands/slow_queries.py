@@ -0,0 +1,101 @@
+"""Команда сводки по журналу медленных SQL-запросов
+(см. blogicum/slow_queries.py).
+"""
+
+import json
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Печатает самые затратные медленные запросы из журнала '
+            'по суммарному времени.')
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--file', type=Path, default=None,
+            help='Файл журнала; по умолчанию settings.SLOW_QUERY_LOG. '
+                 'Ротированные файлы (.1, .2...) читаются тоже.'
+        )
+        parser.add_argument(
+            '--top', type=int, default=10,
+            help='Сколько запросов вывести.'
+        )
+
+    def handle(self, *args, file: Path | None, top: int,
+               **options) -> None:
+        log_file = file or getattr(settings, 'SLOW_QUERY_LOG', None)
+        if log_file is None:
+            raise CommandError(
+                'Журнал медленных запросов не настроен: укажите --file '
+                'или settings.SLOW_QUERY_LOG.'
+            )
+        log_file = Path(log_file)
+        files = sorted(
+            log_file.parent.glob(f'{log_file.name}*'),
+            key=lambda path: path.stat().st_mtime,
+        )
+        if not files:
+            raise CommandError(f'Журнал {log_file} не найден.')
+        stats = {}
+        for path in files:
+            for entry in self.read_entries(path):
+                self.add(stats, entry)
+        if not stats:
+            self.stdout.write('Медленных запросов нет.')
+            return
+        offenders = sorted(
+            stats.values(), key=lambda stat: stat['total_ms'], reverse=True
+        )
+        for number, stat in enumerate(offenders[:top], 1):
+            self.write_stat(number, stat)
+
+    @staticmethod
+    def read_entries(path: Path):
+        with path.open(encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    @staticmethod
+    def add(stats: dict, entry: dict) -> None:
+        stat = stats.setdefault(entry['sql'], {
+            'sql': entry['sql'],
+            'count': 0,
+            'total_ms': 0.0,
+            'slowest': entry,
+            'views': Counter(),
+            'sources': Counter(),
+        })
+        stat['count'] += 1
+        stat['total_ms'] += entry['duration_ms']
+        if entry['duration_ms'] > stat['slowest']['duration_ms']:
+            stat['slowest'] = entry
+        stat['views'][entry.get('view') or '-'] += 1
+        stat['sources'][(entry.get('source') or ['-'])[0]] += 1
+
+    def write_stat(self, number: int, stat: dict) -> None:
+        slowest = stat['slowest']
+        self.stdout.write(
+            f'{number}. всего {stat["total_ms"]:.1f} мс, '
+            f'запросов {stat["count"]}, '
+            f'в среднем {stat["total_ms"] / stat["count"]:.1f} мс, '
+            f'максимум {slowest["duration_ms"]:.1f} мс'
+        )
+        self.stdout.write(f'   {stat["sql"]}')
+        self.stdout.write('   страницы: ' + ', '.join(
+            f'{view} ({count})' for view, count
+            in stat['views'].most_common(3)
+        ))
+        self.stdout.write('   код: ' + ', '.join(
+            f'{source} ({count})' for source, count
+            in stat['sources'].most_common(3)
+        ))
+        for line in slowest.get('plan') or ():
+            self.stdout.write(f'   план: {line}')
+        self.stdout.write('')
@@ -1,8 +1,17 @@
 """Модели приложения Blog: Location, Category, Post."""
 
+from datetime import datetime, timedelta
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db import models
+from django.db.models import Count, F, Min, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.template.defaultfilters import linebreaksbr
 from django.utils import timezone
+from django.utils.text import Truncator
+
+from .cache import timeout_until
 
 User = get_user_model()  # Получаем модель пользователя
 
@@ -10,6 +19,28 @@ User = get_user_model()  # Получаем модель пользовател
 TITLE_MAX_LENGTH = 256
 NAME_MAX_LENGTH = 256
 SLUG_MAX_LENGTH = 64
+# Сколько слов текста поста выводится в карточке
+EXCERPT_WORDS = 10
+
+NEXT_PUBLICATION_CACHE_KEY = 'blog:next-publication'
+# Через сколько секунд снова проверять списки, если дата отложенной
+# публикации наступила, а планировщик ещё не выставил is_visible
+DUE_PUBLICATION_RECHECK = 5
+
+# Поля, которые выводит карточка поста includes/post_card.html
+POST_CARD_FIELDS = (
+    'title', 'excerpt', 'pub_date', 'image', 'is_published',
+    'author', 'author__username',
+    'category', 'category__title', 'category__slug',
+    'category__is_published',
+    'location', 'location__name', 'location__is_published',
+    'comment_count', 'updated_at',
+)
+
+
+def render_text_html(text: str) -> str:
+    """HTML текста как у фильтра linebreaksbr в шаблонах."""
+    return linebreaksbr(text, autoescape=True)
 
 
 class PublishedModel(models.Model):
@@ -69,12 +100,137 @@ class PostQuerySet(models.QuerySet):
     и датой публикации не позже текущего времени.
     """
 
-    def published(self) -> models.QuerySet:
-        return self.filter(
+    @staticmethod
+    def visibility_filter(now: datetime | None = None) -> Q:
+        """Условие, при котором пост виден всем пользователям. В запросах
+        списков вместо него используется сохранённый флаг is_visible.
+        """
+        return Q(
             is_published=True,
-            pub_date__lte=timezone.now(),
+            pub_date__lte=now or timezone.now(),
             category__is_published=True
-        ).order_by('-pub_date')
+        )
+
+    def published(self) -> models.QuerySet:
+        return self.filter(is_visible=True).order_by('-pub_date')
+
+    def due_for_publication(self) -> models.QuerySet:
+        """Отложенные посты, дата публикации которых уже наступила,
+        но флаг is_visible ещё не выставлен.
+        """
+        return self.filter(self.visibility_filter(), is_visible=False)
+
+    def with_stale_visibility(self, now: datetime) -> models.QuerySet:
+        """Посты, у которых флаг is_visible расходится
+        с visibility_filter() на момент now.
+        """
+        condition = self.visibility_filter(now)
+        return self.filter(
+            Q(pk__in=self.filter(condition, is_visible=False).values('pk'))
+            | Q(pk__in=self.exclude(condition).filter(is_visible=True)
+                .values('pk'))
+        )
+
+    def refresh_visibility(self, now: datetime | None = None) -> int:
+        """Пересчитывает is_visible по visibility_filter() и возвращает
+        количество изменённых постов.
+        """
+        now = now or timezone.now()
+        condition = self.visibility_filter(now)
+        return (
+            self.filter(condition, is_visible=False).update(
+                is_visible=True, updated_at=now
+            )
+            + self.exclude(condition).filter(is_visible=True).update(
+                is_visible=False, updated_at=now
+            )
+        )
+
+    def next_publication_at(self) -> datetime | None:
+        """Ближайшая будущая дата публикации отложенного поста: до неё
+        списки опубликованных постов не меняются сами по себе.
+
+        Пост появляется в списках, когда планировщик выставит ему
+        is_visible, а не ровно в pub_date. Пока есть наступившие, но
+        ещё не открытые посты, возвращается момент через
+        DUE_PUBLICATION_RECHECK секунд: списки, закешированные без
+        такого поста, быстро истекут и после его открытия.
+        """
+        now = timezone.now()
+        next_pub_date = self.filter(
+            is_published=True, is_visible=False,
+            category__is_published=True,
+        ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+        if next_pub_date is not None and next_pub_date <= now:
+            return now + timedelta(seconds=DUE_PUBLICATION_RECHECK)
+        return next_pub_date
+
+    def visible_to(self, user) -> models.QuerySet:
+        """Посты, которые может видеть пользователь: опубликованные
+        и, для автора, все его собственные.
+        """
+        condition = Q(is_visible=True)
+        if user.is_authenticated:
+            condition |= Q(author=user)
+        return self.filter(condition)
+
+    def for_detail(self, user) -> models.QuerySet:
+        """Посты для страницы поста: видимые пользователю, вместе
+        с автором, категорией и местоположением.
+        """
+        return self.select_related(
+            'author', 'category', 'location'
+        ).visible_to(user)
+
+    def for_cards(self) -> models.QuerySet:
+        """Посты для карточек списков: связанные автор, категория
+        и местоположение подтягиваются одним запросом, загружаются
+        только выводимые в карточке поля.
+        """
+        return self.select_related(
+            'author', 'category', 'location'
+        ).only(*POST_CARD_FIELDS)
+
+    def touch(self) -> int:
+        """Отмечает посты изменёнными: их страницы в браузерах
+        и у поисковых роботов устарели.
+        """
+        return self.update(updated_at=timezone.now())
+
+    def change_comment_count(self, delta: int) -> int:
+        """Атомарно меняет счётчик комментариев на delta."""
+        return self.update(
+            comment_count=F('comment_count') + delta,
+            updated_at=timezone.now()
+        )
+
+    def recount_comments(self) -> int:
+        """Пересчитывает разошедшиеся счётчики комментариев одним
+        UPDATE и возвращает количество исправленных постов.
+        """
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(post=OuterRef('pk')).order_by().values(
+                'post'
+            ).annotate(total=Count('id')).values('total')
+        ), 0)
+        return self.alias(actual=actual).exclude(
+            comment_count=F('actual')
+        ).update(comment_count=actual)
+
+
+def get_next_publication_at() -> datetime | None:
+    """Ближайшая отложенная публикация с кешированием до этого момента
+    или до сохранения любого поста.
+    """
+    cached = cache.get(NEXT_PUBLICATION_CACHE_KEY)
+    if cached is not None:
+        return cached or None
+    next_pub_date = Post.objects.next_publication_at()
+    cache.set(
+        NEXT_PUBLICATION_CACHE_KEY, next_pub_date or '',
+        timeout_until(next_pub_date, None)
+    )
+    return next_pub_date
 
 
 class Post(PublishedModel):
@@ -82,6 +238,19 @@ class Post(PublishedModel):
 
     title = models.CharField('Заголовок', max_length=TITLE_MAX_LENGTH)
     text = models.TextField('Текст')
+    excerpt = models.TextField(
+        'Анонс',
+        blank=True,
+        editable=False,
+        help_text='Начало текста для карточки. Заполняется автоматически.'
+    )
+    text_html = models.TextField(
+        'Текст в HTML',
+        blank=True,
+        editable=False,
+        help_text='Экранированный текст с переносами строк. '
+                  'Заполняется автоматически.'
+    )
     pub_date = models.DateTimeField(
         'Дата и время публикации',
         help_text=(
@@ -90,6 +259,32 @@ class Post(PublishedModel):
         )
     )
     image = models.ImageField('Изображение', blank=True)
+    comment_count = models.PositiveIntegerField(
+        'Количество комментариев',
+        default=0,
+        editable=False,
+        help_text='Обновляется автоматически при изменении комментариев.'
+    )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+        # Для загрузки фикстур без этого поля: loaddata не вызывает
+        # pre_save и auto_now не срабатывает.
+        db_default=Now(),
+        help_text=(
+            'Время последнего изменения поста, его комментариев '
+            'или выводимых вместе с ним объектов.'
+        )
+    )
+    is_visible = models.BooleanField(
+        'Виден всем',
+        default=False,
+        editable=False,
+        help_text=(
+            'Опубликован, дата публикации наступила и категория '
+            'опубликована. Обновляется автоматически.'
+        )
+    )
 
     author = models.ForeignKey(User, on_delete=models.CASCADE,
                                verbose_name='Автор публикации')
@@ -107,16 +302,78 @@ class Post(PublishedModel):
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        # Индексы под фильтры и сортировку PostQuerySet.published()
+        # и списков постов категории и автора. Условие is_visible
+        # вынесено в частичные индексы: фильтр по булеву полю Django
+        # выражает как "WHERE is_visible", а не сравнением, и SQLite
+        # не использует такой столбец как префикс составного индекса.
+        indexes = (
+            models.Index(
+                fields=('pub_date',),
+                condition=Q(is_visible=True),
+                name='post_visible_date_idx',
+            ),
+            models.Index(
+                fields=('category', 'pub_date'),
+                condition=Q(is_visible=True),
+                name='post_visible_category_date_idx',
+            ),
+            models.Index(
+                fields=('author', 'pub_date'),
+                name='post_author_date_idx',
+            ),
+            # MAX(updated_at) для валидаторов условных запросов списков
+            models.Index(
+                fields=('updated_at',),
+                condition=Q(is_visible=True),
+                name='post_visible_updated_idx',
+            ),
+            models.Index(
+                fields=('category', 'updated_at'),
+                condition=Q(is_visible=True),
+                name='post_visible_category_upd_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.title
 
+    def compute_visibility(self) -> bool:
+        """Виден ли пост всем пользователям прямо сейчас."""
+        return (
+            self.is_published
+            and self.pub_date <= timezone.now()
+            and self.category is not None
+            and self.category.is_published
+        )
+
+    def make_excerpt(self) -> str:
+        """Анонс как у фильтра truncatewords в карточке поста."""
+        return Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+
+    def save(self, *args, **kwargs) -> None:
+        self.is_visible = self.compute_visibility()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'is_visible'}
+            if 'text' in update_fields:
+                update_fields.update(('excerpt', 'text_html'))
+            kwargs['update_fields'] = update_fields
+        if update_fields is None or 'text' in update_fields:
+            self.excerpt = self.make_excerpt()
+            self.text_html = render_text_html(self.text)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Комментарий к публикации."""
 
     text = models.TextField('Текст комментария')
+    text_html = models.TextField('Текст в HTML', blank=True, editable=False)
     created_at = models.DateTimeField('Добавлено', auto_now_add=True)
+    updated_at = models.DateTimeField(
+        'Изменено', auto_now=True, db_default=Now()
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -134,6 +391,22 @@ class Comment(models.Model):
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ('created_at',)
+        # Порции комментариев поста (get_comments_paginator) читаются
+        # по индексу от курсора, без сортировки всех комментариев поста.
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx',
+            ),
+        )
 
     def __str__(self) -> str:
         return self.text[:20]
+
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html'}
+        if update_fields is None or 'text' in update_fields:
+            self.text_html = render_text_html(self.text)
+        super().save(*args, **kwargs)
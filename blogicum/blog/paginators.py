@@ -0,0 +1,251 @@
+"""Пагинаторы списков: номера страниц с дешёвым кешируемым подсчётом
+для первых страниц постов и курсоры (keyset) для всего, что глубже,
+а также для подгрузки комментариев.
+"""
+
+import base64
+import binascii
+import time
+from collections.abc import Sequence
+from datetime import datetime
+
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
+from django.db.models import Model, Q, QuerySet
+from django.utils.formats import number_format
+from django.utils.functional import cached_property
+
+from .cache import timeout_until
+from .models import get_next_publication_at
+
+# Порядок, по которому строятся курсоры: pub_date не уникальна,
+# поэтому при равных датах порядок задаёт id.
+KEYSET_ORDERING = ('-pub_date', '-id')
+# Больше этого числа постов точно не считаем, выводим "10 000+"
+POST_COUNT_CAP = 10_000
+# Сколько секунд хранится в кеше количество постов списка
+POST_COUNT_CACHE_TIMEOUT = 60
+POST_COUNT_GENERATION_KEY = 'blog:post-count-generation'
+
+
+def encode_cursor(obj: Model, date_field: str = 'pub_date') -> str:
+    """Кодирует позицию объекта в непрозрачный токен для URL."""
+    raw = f'{getattr(obj, date_field).isoformat()}|{obj.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str) -> tuple[datetime, int] | None:
+    """Возвращает (дата, id) из токена или None, если токен
+    повреждён.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date, pk = raw.split('|')
+        return datetime.fromisoformat(date), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def invalidate_post_counts() -> None:
+    """Сбрасывает все закешированные количества постов списков."""
+    try:
+        cache.incr(POST_COUNT_GENERATION_KEY)
+    except ValueError:
+        cache.set(POST_COUNT_GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+def _post_count_cache_key(scope: str) -> str:
+    generation = cache.get_or_set(
+        POST_COUNT_GENERATION_KEY, time.time_ns, timeout=None
+    )
+    return f'blog:post-count:{generation}:{scope}'
+
+
+class CountingPaginator(Paginator):
+    """Пагинатор, который считает посты дёшево.
+
+    Количество считается по count_queryset (базовый запрос без
+    join-ов карточек), не больше count_cap + 1 строк, и кешируется
+    на POST_COUNT_CACHE_TIMEOUT секунд под ключом count_scope.
+    Страница получает сокращённый список номеров page_range.
+    """
+
+    def __init__(self, object_list, per_page,
+                 count_queryset: QuerySet | None = None,
+                 count_scope: str | None = None,
+                 count_cap: int | None = None, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_queryset = (
+            object_list if count_queryset is None else count_queryset
+        )
+        self.count_scope = count_scope
+        self.count_cap = POST_COUNT_CAP if count_cap is None else count_cap
+
+    @cached_property
+    def count(self) -> int:
+        key = None
+        if self.count_scope is not None:
+            key = _post_count_cache_key(self.count_scope)
+            count = cache.get(key)
+            if count is not None:
+                return count
+        count = self.count_queryset.order_by().values('pk')[
+            :self.count_cap + 1
+        ].count()
+        if key is not None:
+            cache.set(key, count, timeout_until(
+                get_next_publication_at(), POST_COUNT_CACHE_TIMEOUT
+            ))
+        return count
+
+    @property
+    def is_count_capped(self) -> bool:
+        return self.count > self.count_cap
+
+    @property
+    def count_display(self) -> str:
+        """Количество для вывода: точное или "10 000+"."""
+        if self.is_count_capped:
+            return f'{number_format(self.count_cap, force_grouping=True)}+'
+        return number_format(self.count, force_grouping=True)
+
+    def page(self, number) -> Page:
+        page = super().page(number)
+        page.page_range = self.get_elided_page_range(page.number)
+        return page
+
+
+class NumberedPaginator(CountingPaginator):
+    """Классический пагинатор, в котором номера доступны только
+    для первых max_pages страниц. Последняя из них вместо ссылки
+    на следующий номер получает курсор next_cursor.
+    """
+
+    def __init__(self, object_list, per_page, max_pages: int, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.max_pages = max_pages
+
+    @cached_property
+    def has_more_pages(self) -> bool:
+        """Есть ли посты дальше последней нумерованной страницы."""
+        return self.count > self.max_pages * self.per_page
+
+    @cached_property
+    def num_pages(self) -> int:
+        if self.has_more_pages:
+            return self.max_pages
+        return super().num_pages
+
+    def page(self, number) -> Page:
+        page = super().page(number)
+        page.next_cursor = None
+        if page.number == self.num_pages and self.has_more_pages:
+            page.next_cursor = encode_cursor(page[-1])
+        return page
+
+
+class KeysetPage(Sequence):
+    """Страница, полученная поиском по индексу от курсора,
+    без COUNT и OFFSET.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list: list, has_next: bool,
+                 has_previous: bool, date_field: str = 'pub_date'):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.date_field = date_field
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self._has_next
+
+    def has_previous(self) -> bool:
+        return self._has_previous
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self) -> str | None:
+        if self.has_next() and self.object_list:
+            return encode_cursor(self.object_list[-1], self.date_field)
+        return None
+
+    @property
+    def previous_cursor(self) -> str | None:
+        if self.has_previous() and self.object_list:
+            return encode_cursor(self.object_list[0], self.date_field)
+        return None
+
+
+class KeysetPaginator:
+    """Пагинатор по курсору в порядке (дата, id).
+
+    По умолчанию листает посты от новых к старым, как KEYSET_ORDERING;
+    с descending=False листает от старых к новым.
+    """
+
+    def __init__(self, object_list: QuerySet, per_page: int,
+                 date_field: str = 'pub_date', descending: bool = True):
+        self.object_list = object_list
+        self.per_page = per_page
+        self.date_field = date_field
+        self.descending = descending
+
+    def _ordering(self, forward: bool) -> tuple[str, str]:
+        prefix = '-' if self.descending == forward else ''
+        return f'{prefix}{self.date_field}', f'{prefix}id'
+
+    def _rows(self, cursor: tuple[datetime, int] | None,
+              forward: bool) -> list:
+        queryset = self.object_list
+        if cursor is not None:
+            date, pk = cursor
+            lookup = 'lt' if self.descending == forward else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{self.date_field}__{lookup}': date})
+                | Q(**{f'id__{lookup}': pk}),
+                **{f'{self.date_field}__{lookup}e': date},
+            )
+        return list(
+            queryset.order_by(*self._ordering(forward))[:self.per_page + 1]
+        )
+
+    def first_page(self) -> KeysetPage:
+        """Первая страница списка."""
+        rows = self._rows(None, forward=True)
+        return KeysetPage(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=False,
+            date_field=self.date_field,
+        )
+
+    def page_after(self, cursor: tuple[datetime, int]) -> KeysetPage:
+        """Страница объектов, следующих за курсором."""
+        rows = self._rows(cursor, forward=True)
+        return KeysetPage(
+            rows[:self.per_page],
+            has_next=len(rows) > self.per_page,
+            has_previous=True,
+            date_field=self.date_field,
+        )
+
+    def page_before(self, cursor: tuple[datetime, int]) -> KeysetPage:
+        """Страница объектов, предшествующих курсору."""
+        rows = self._rows(cursor, forward=False)
+        return KeysetPage(
+            rows[:self.per_page][::-1],
+            has_next=True,
+            has_previous=len(rows) > self.per_page,
+            date_field=self.date_field,
+        )
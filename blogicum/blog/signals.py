@@ -0,0 +1,202 @@
+"""Обработчики сигналов моделей блога.
+
+Кеши сбрасываются после фиксации транзакции, в которой изменились
+данные: иначе запрос из другого потока или процесса, выполненный до
+COMMIT, закеширует старые данные под уже новыми версиями тегов.
+Страницу, которая рендерилась во время сброса, кеш не отдаст сам:
+версия тега — время сброса, и она сравнивается со временем начала
+рендеринга (см. blog/cache.py).
+"""
+
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Q, Value, When
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import invalidate_tags
+from .models import (NEXT_PUBLICATION_CACHE_KEY, Category, Comment,
+                     Location, Post, User)
+from .paginators import invalidate_post_counts
+
+
+@receiver(post_save, sender=Comment)
+def increment_comment_count(sender, instance: Comment, created: bool,
+                            **kwargs) -> None:
+    """Увеличивает счётчик комментариев поста при добавлении
+    комментария.
+    """
+    if created:
+        Post.objects.filter(pk=instance.post_id).change_comment_count(1)
+
+
+@receiver(post_delete, sender=Comment)
+def decrement_comment_count(sender, instance: Comment, **kwargs) -> None:
+    """Уменьшает счётчик комментариев поста при удалении комментария,
+    в том числе каскадном при удалении пользователя. При удалении
+    самого поста счётчик обновлять не нужно.
+    """
+    origin = kwargs.get('origin')
+    if getattr(origin, 'model', type(origin)) is Post:
+        return
+    Post.objects.filter(pk=instance.post_id).change_comment_count(-1)
+
+
+@receiver(post_save, sender=Category)
+def update_category_posts(sender, instance: Category, created: bool,
+                          **kwargs) -> None:
+    """Одним UPDATE пересчитывает is_visible постов категории
+    и отмечает их изменёнными: в них выводится категория.
+    """
+    if created:
+        return
+    now = timezone.now()
+    is_visible = Value(False)
+    if instance.is_published:
+        is_visible = Case(
+            When(is_published=True, pub_date__lte=now, then=Value(True)),
+            default=Value(False),
+        )
+    Post.objects.filter(category=instance).update(
+        is_visible=is_visible, updated_at=now
+    )
+
+
+@receiver(pre_delete, sender=Category)
+def hide_category_posts(sender, instance: Category, **kwargs) -> None:
+    """Скрывает посты удаляемой категории: после удаления они
+    останутся без категории.
+    """
+    Post.objects.filter(category=instance).update(
+        is_visible=False, updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Comment)
+def touch_commented_post(sender, instance: Comment, created: bool,
+                         **kwargs) -> None:
+    """Отмечает пост изменённым при правке комментария; при
+    добавлении это делает increment_comment_count.
+    """
+    if not created:
+        Post.objects.filter(pk=instance.post_id).touch()
+
+
+@receiver(post_save, sender=Location)
+@receiver(pre_delete, sender=Location)
+def touch_location_posts(sender, instance: Location, **kwargs) -> None:
+    """Отмечает изменёнными посты, в которых выводится
+    местоположение.
+    """
+    Post.objects.filter(location=instance).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_user_posts(sender, instance, created: bool, **kwargs) -> None:
+    """Отмечает изменёнными посты и комментарии пользователя, где
+    выводится его имя. Обновление только времени входа не в счёт.
+    """
+    if created or kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+    Post.objects.filter(
+        Q(author=instance) | Q(comments__author=instance)
+    ).touch()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_post_counts(sender, using: str, **kwargs) -> None:
+    """Сбрасывает закешированные количества постов в списках."""
+    transaction.on_commit(invalidate_post_counts, using=using)
+
+
+@receiver(pre_save, sender=Post)
+def remember_previous_lists(sender, instance: Post, **kwargs) -> None:
+    """Запоминает прежние категорию и автора поста, чтобы сбросить
+    кеш списков, из которых пост ушёл.
+    """
+    instance.previous_category_id = instance.previous_author_id = None
+    if instance.pk is not None:
+        instance.previous_category_id, instance.previous_author_id = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list('category_id', 'author_id').first()
+            or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance: Post, using: str,
+                          **kwargs) -> None:
+    """Сбрасывает страницы с постом и списки, в которые он входит,
+    и закешированную дату ближайшей отложенной публикации.
+    """
+    category_ids = {
+        instance.category_id,
+        getattr(instance, 'previous_category_id', None),
+    }
+    author_ids = {
+        instance.author_id,
+        getattr(instance, 'previous_author_id', None),
+    }
+    transaction.on_commit(
+        partial(cache.delete, NEXT_PUBLICATION_CACHE_KEY), using=using
+    )
+    transaction.on_commit(partial(
+        invalidate_tags,
+        f'post:{instance.pk}',
+        'post-list',
+        *(f'post-list:category:{pk}' for pk in category_ids if pk),
+        *(f'post-list:author:{pk}' for pk in author_ids if pk),
+    ), using=using)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance: Comment, using: str,
+                             **kwargs) -> None:
+    """Сбрасывает страницы, где выводятся комментарии или их счётчик."""
+    transaction.on_commit(
+        partial(invalidate_tags, f'post:{instance.post_id}'), using=using
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_pages(sender, instance: Category, using: str,
+                              **kwargs) -> None:
+    """Сбрасывает страницы с категорией; снятие категории
+    с публикации меняет и состав общего списка постов.
+    """
+    transaction.on_commit(partial(
+        invalidate_tags, f'category:{instance.pk}', 'post-list'
+    ), using=using)
+
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_location_pages(sender, instance: Location, using: str,
+                              **kwargs) -> None:
+    """Сбрасывает страницы, где выводится местоположение."""
+    transaction.on_commit(
+        partial(invalidate_tags, f'location:{instance.pk}'), using=using
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_pages(sender, instance, using: str, **kwargs) -> None:
+    """Сбрасывает страницы, где выводится пользователь. Обновление
+    только времени входа на страницах не видно.
+    """
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+    transaction.on_commit(
+        partial(invalidate_tags, f'user:{instance.pk}'), using=using
+    )
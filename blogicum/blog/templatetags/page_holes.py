@@ -0,0 +1,57 @@
+"""Тег {% hole %} для зависящих от пользователя частей страниц,
+которые кешируются общими для всех, см. blog/cache.py.
+
+    {% hole 'includes/comment_form.html' post_id=post.id %}
+      {% bootstrap_form form %}
+    {% endhole %}
+
+Часть рендерится шаблоном из первого аргумента с контекстом из
+именованных аргументов и контекст-процессоров запроса (user,
+csrf_token...), но не страницы. Содержимое тега рендерится вместе
+со страницей и попадает в шаблон части как hole_body: так общая
+для всех разметка остаётся в кеше страницы.
+"""
+
+from django import template
+from django.template.base import token_kwargs
+
+from blog.cache import render_hole
+
+register = template.Library()
+
+
+class HoleNode(template.Node):
+
+    def __init__(self, template_name, extra_context, nodelist):
+        self.template_name = template_name
+        self.extra_context = extra_context
+        self.nodelist = nodelist
+
+    def render(self, context) -> str:
+        hole_context = {
+            name: value.resolve(context)
+            for name, value in self.extra_context.items()
+        }
+        hole_context['hole_body'] = self.nodelist.render(context)
+        return render_hole(
+            context.get('request'),
+            self.template_name.resolve(context),
+            hole_context,
+        )
+
+
+@register.tag
+def hole(parser, token) -> HoleNode:
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} ожидает имя шаблона части.'
+        )
+    extra_context = token_kwargs(bits[2:], parser)
+    if len(extra_context) != len(bits) - 2:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает только именованные аргументы.'
+        )
+    nodelist = parser.parse(('endhole',))
+    parser.delete_first_token()
+    return HoleNode(parser.compile_filter(bits[1]), extra_context, nodelist)
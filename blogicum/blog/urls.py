@@ -7,6 +7,16 @@ from .views import (CommentCreateView, CommentUpdateView, CommentDeleteView,
 
 app_name = 'blog'
 
+# Настройки заголовка Server-Timing по именам страниц поверх
+# settings.SERVER_TIMING (см. blogicum/middleware.py): замеры самых
+# посещаемых страниц пишутся ещё и в лог.
+server_timing = {
+    'index': {'LOG': True},
+    'post_detail': {'LOG': True},
+    'category_posts': {'LOG': True},
+    'profile': {'LOG': True},
+}
+
 urlpatterns = [
     path('', views.index, name='index'),
     path(
@@ -44,6 +54,11 @@ urlpatterns = [
         views.post_detail,
         name='post_detail'
     ),
+    path(
+        'posts/<int:pk>/comments/',
+        views.post_comments,
+        name='post_comments'
+    ),
     path(
         'category/<slug:category_slug>/',
         views.category_posts,
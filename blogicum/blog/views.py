@@ -2,59 +2,189 @@
 категорий и профиля пользователя.
 """
 
+from collections.abc import Sequence
 from typing import Any
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.models import AbstractBaseUser
-from django.core.paginator import Page, Paginator
+from django.core.paginator import Page
+from django.db import transaction
 from django.db.models import Count, QuerySet
 from django.http import (Http404, HttpRequest, HttpResponse,
                          HttpResponseRedirect)
 from django.shortcuts import get_object_or_404, render
+from django.template.loader import render_to_string
 from django.urls import reverse, reverse_lazy
-from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.safestring import mark_safe
 from django.views.generic import CreateView, DeleteView, DetailView, UpdateView
 
+from .cache import (add_page_cache_tags, cache_shared_page, get_page_cache,
+                    page_cache_settings, post_cache_tags,
+                    post_card_cache_key, set_page_cache_expiry)
+from .conditional import (category_validators, conditional_page,
+                          index_validators, post_validators)
 from .forms import CommentForm, PostForm
-from .models import Category, Comment, Post
+from .models import Category, Comment, Post, get_next_publication_at
+from .paginators import (KEYSET_ORDERING, CountingPaginator, KeysetPage,
+                         KeysetPaginator, NumberedPaginator, decode_cursor)
+from .write_queue import run_write
 
 User = get_user_model()
 
 # Максимальное количество постов на странице
 INDEX_POST_LIMIT = 10
+# Сколько первых страниц доступно по номеру в режиме курсоров
+NUMBERED_PAGES_LIMIT = 5
+# Сколько комментариев выводится сразу и подгружается за раз
+COMMENTS_PER_PAGE = 50
 
 
-def get_paginator(posts: QuerySet[Post], request: HttpRequest) -> Page:
-    """Разбивает посты на страницы и возвращает текущую страницу."""
-    paginator = Paginator(posts, INDEX_POST_LIMIT)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+def attach_comment_counts(posts: Sequence[Post]) -> None:
+    """Проставляет постам comment_count одним сгруппированным COUNT
+    только по переданным постам, а не по всему списку.
+    """
+    counts = dict(
+        Comment.objects.filter(post__in=[post.pk for post in posts])
+        .order_by().values('post').annotate(total=Count('id'))
+        .values_list('post', 'total')
+    )
+    for post in posts:
+        post.comment_count = counts.get(post.pk, 0)
+
 
+def attach_card_html(posts: Sequence[Post]) -> None:
+    """Проставляет постам готовый HTML карточки card_html: из кеша
+    одним get_many, а недостающие карточки рендерит и кеширует.
+    """
+    settings = page_cache_settings()
+    if not settings['ENABLED']:
+        return
+    page_cache = get_page_cache()
+    keys = {post_card_cache_key(post): post for post in posts}
+    cards = page_cache.get_many(keys)
+    rendered = {
+        key: render_to_string('includes/post_card.html', {'post': post})
+        for key, post in keys.items() if key not in cards
+    }
+    if rendered:
+        page_cache.set_many(rendered, settings['CARD_TIMEOUT'])
+    for key, post in keys.items():
+        post.card_html = mark_safe(
+            cards[key] if key in cards else rendered[key]
+        )
 
+
+def get_paginator(
+    posts: QuerySet[Post], request: HttpRequest, keyset: bool = False,
+    count_comments: bool = False, count_queryset: QuerySet | None = None,
+    count_scope: str | None = None
+) -> Page | KeysetPage:
+    """Разбивает посты на страницы и возвращает текущую страницу.
+
+    В режиме keyset по номеру доступны только первые
+    NUMBERED_PAGES_LIMIT страниц, дальше список листается курсорами
+    ?after= и ?before= без OFFSET. С count_comments счётчики
+    комментариев считаются заново только для постов страницы.
+    Количество постов считается по count_queryset и кешируется
+    под ключом count_scope. Карточки постов страницы получают
+    готовый HTML из кеша.
+    """
+    page_obj = _get_page(
+        posts, request, keyset,
+        count_queryset=count_queryset, count_scope=count_scope
+    )
+    page_obj.object_list = list(page_obj.object_list)
+    if count_comments:
+        attach_comment_counts(page_obj.object_list)
+    attach_card_html(page_obj.object_list)
+    return page_obj
+
+
+def _get_page(
+    posts: QuerySet[Post], request: HttpRequest, keyset: bool,
+    **count_options
+) -> Page | KeysetPage:
+    """Возвращает текущую страницу постов без подсчёта комментариев."""
+    if not keyset:
+        paginator = CountingPaginator(
+            posts, INDEX_POST_LIMIT, **count_options
+        )
+        return paginator.get_page(request.GET.get('page'))
+
+    posts = posts.order_by(*KEYSET_ORDERING)
+    keyset_paginator = KeysetPaginator(posts, INDEX_POST_LIMIT)
+    for param, get_page in (('after', keyset_paginator.page_after),
+                            ('before', keyset_paginator.page_before)):
+        cursor = decode_cursor(request.GET.get(param, ''))
+        if cursor is not None:
+            return get_page(cursor)
+    paginator = NumberedPaginator(
+        posts, INDEX_POST_LIMIT, max_pages=NUMBERED_PAGES_LIMIT,
+        **count_options
+    )
+    return paginator.get_page(request.GET.get('page'))
+
+
+def add_cards_cache_tags(request: HttpRequest, page_obj, *tags) -> None:
+    """Отмечает для кеша страниц список и выведенные карточки постов.
+    Страница списка хранится до ближайшей отложенной публикации;
+    страницы по курсору, которых может быть сколько угодно, — не
+    дольше TIMEOUT.
+    """
+    add_page_cache_tags(request, *tags)
+    for post in page_obj:
+        add_page_cache_tags(request, *post_cache_tags(post))
+    config = page_cache_settings()
+    set_page_cache_expiry(
+        request,
+        config['TIMEOUT'] if isinstance(page_obj, KeysetPage)
+        else config['LIST_TIMEOUT'],
+        get_next_publication_at
+    )
+
+
+@cache_shared_page
+@conditional_page(index_validators)
 def index(request: HttpRequest) -> HttpResponse:
     """Главная страница: список опубликованных постов
     с разбивкой на страницы.
     """
-    posts = Post.objects.published().annotate(comment_count=Count('comments'))
-    page_obj = get_paginator(posts, request)
+    posts = Post.objects.published()
+    page_obj = get_paginator(
+        posts.for_cards(), request, keyset=True,
+        count_queryset=posts, count_scope='index'
+    )
+    add_cards_cache_tags(request, page_obj, 'post-list')
     context = {
         'page_obj': page_obj
     }
     return render(request, 'blog/index.html', context)
 
 
-def post_detail(request: HttpRequest, pk: int) -> HttpResponse:
-    """Страница поста по идентификатору."""
-    post = get_object_or_404(Post, pk=pk)
+def get_comments_paginator(post: Post) -> KeysetPaginator:
+    """Курсорный пагинатор комментариев поста от старых к новым."""
+    return KeysetPaginator(
+        post.comments.select_related('author'), COMMENTS_PER_PAGE,
+        date_field='created_at', descending=False
+    )
 
-    if ((not post.is_published or post.pub_date > timezone.now()
-         or not post.category.is_published)
-            and post.author != request.user):
-        raise Http404
 
+@cache_shared_page
+@conditional_page(post_validators)
+def post_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """Страница поста по идентификатору."""
+    post = get_object_or_404(Post.objects.for_detail(request.user), pk=pk)
     form = CommentForm()
-    comments = post.comments.select_related('author')
+    comments = get_comments_paginator(post).first_page()
+    add_page_cache_tags(
+        request, *post_cache_tags(post),
+        *(f'user:{comment.author_id}' for comment in comments)
+    )
+    if not post.is_visible:
+        # Скрытый пост видит только автор: в общий кеш его не кладём.
+        set_page_cache_expiry(request, 0)
 
     context = {
         'post': post,
@@ -64,6 +194,26 @@ def post_detail(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, 'blog/detail.html', context)
 
 
+def post_comments(request: HttpRequest, pk: int) -> HttpResponse:
+    """HTML-фрагмент со следующей порцией комментариев поста
+    после курсора ?after=.
+    """
+    post = get_object_or_404(
+        Post.objects.visible_to(request.user).only('id'), pk=pk
+    )
+    cursor = decode_cursor(request.GET.get('after', ''))
+    if cursor is None:
+        raise Http404
+    context = {
+        'post': post,
+        'comments': get_comments_paginator(post).page_after(cursor),
+        'comments_fragment': True,
+    }
+    return render(request, 'includes/comments.html', context)
+
+
+@cache_shared_page
+@conditional_page(category_validators)
 def category_posts(request: HttpRequest, category_slug: str) -> HttpResponse:
     """Список постов выбранной категории."""
     category = get_object_or_404(
@@ -72,7 +222,14 @@ def category_posts(request: HttpRequest, category_slug: str) -> HttpResponse:
         is_published=True
     )
     posts = Post.objects.published().filter(category=category)
-    page_obj = get_paginator(posts, request)
+    page_obj = get_paginator(
+        posts.for_cards(), request, keyset=True,
+        count_queryset=posts, count_scope=f'category:{category.pk}'
+    )
+    add_cards_cache_tags(
+        request, page_obj,
+        f'post-list:category:{category.pk}', f'category:{category.pk}'
+    )
 
     context = {
         'category': category,
@@ -112,6 +269,7 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
         return self.request.user
 
 
+@method_decorator(cache_shared_page, name='dispatch')
 class ProfileDetailView(DetailView):
     """Страница профиля пользователя с его публикациями."""
 
@@ -124,10 +282,15 @@ class ProfileDetailView(DetailView):
     def get_context_data(self, **kwargs) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         user = self.object
-        posts = Post.objects.filter(author=user).annotate(
-            comment_count=Count('comments')
-        ).order_by('-pub_date')
-        page_obj = get_paginator(posts, self.request)
+        posts = Post.objects.filter(author=user)
+        page_obj = get_paginator(
+            posts.for_cards().order_by('-pub_date'), self.request,
+            count_queryset=posts, count_scope=f'profile:{user.pk}'
+        )
+        add_cards_cache_tags(
+            self.request, page_obj, f'post-list:author:{user.pk}',
+            f'user:{user.pk}'
+        )
 
         context['page_obj'] = page_obj
         return context
@@ -141,9 +304,12 @@ class PostCreateView(LoginRequiredMixin, CreateView):
     template_name = 'blog/create.html'
 
     def form_valid(self, form: PostForm) -> HttpResponse:
-        """Устанавливает автора поста перед сохранением."""
+        """Устанавливает автора поста и сохраняет пост через
+        очередь записей.
+        """
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        self.object = run_write(form.save)
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self) -> str:
         return reverse(
@@ -202,10 +368,13 @@ class CommentCreateView(LoginRequiredMixin, CreateView):
         return super().dispatch(request, *args, **kwargs)
 
     def form_valid(self, form: CommentForm) -> HttpResponse:
-        """Устанавливает автора и пост перед сохранением комментария."""
+        """Устанавливает автора и пост и сохраняет комментарий через
+        очередь записей вместе с обновлением счётчика поста.
+        """
         form.instance.post = self.post_object
         form.instance.author = self.request.user
-        return super().form_valid(form)
+        self.object = run_write(form.save)
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_success_url(self) -> str:
         return reverse('blog:post_detail', kwargs={'pk': self.post_object.pk})
@@ -240,5 +409,12 @@ class CommentDeleteView(RedirectToPostMixin, AuthorRequiredMixin, DeleteView):
         """
         return get_object_or_404(Comment, pk=self.kwargs['comment_pk'])
 
+    def form_valid(self, form) -> HttpResponse:
+        """Удаляет комментарий вместе с обновлением счётчика поста
+        в одной транзакции.
+        """
+        with transaction.atomic():
+            return super().form_valid(form)
+
     def get_success_url(self) -> str:
         return reverse('blog:post_detail', kwargs={'pk': self.object.post.pk})
@@ -0,0 +1,66 @@
+"""Прогрев новых соединений с базой.
+
+При постоянных соединениях (CONN_MAX_AGE) одно соединение обслуживает
+много запросов. Модуль sqlite3 кеширует подготовленные выражения
+соединения по тексту SQL, а SQLite держит прочитанные страницы
+таблиц и индексов в кеше соединения. Если включён
+settings.BLOG_WARM_UP_CONNECTIONS, частые запросы страниц блога
+выполняются один раз при открытии соединения, и за их разбор и
+чтение индексов с диска не платит первый запрос пользователя.
+"""
+
+from collections.abc import Callable
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError
+from django.db.backends.signals import connection_created
+from django.db.models import Max
+from django.dispatch import receiver
+
+from .models import Post
+from .paginators import KEYSET_ORDERING
+
+
+def warm_up_queries(alias: str) -> list[Callable[[], object]]:
+    """Запросы главной страницы, списков и страницы поста. Текст SQL
+    должен совпадать с запросами представлений: по нему sqlite3 ищет
+    подготовленное выражение в кеше соединения.
+    """
+    from .conditional import post_updated_at
+    from .views import INDEX_POST_LIMIT
+
+    posts = Post.objects.using(alias).published()
+    anonymous = AnonymousUser()
+
+    def post_detail() -> None:
+        try:
+            Post.objects.using(alias).for_detail(anonymous).get(pk=0)
+        except Post.DoesNotExist:
+            pass
+
+    return [
+        # Валидаторы условных запросов списков (blog.conditional)
+        lambda: posts.order_by().aggregate(updated_at=Max('updated_at')),
+        # Первая страница главной
+        lambda: list(
+            posts.for_cards().order_by(*KEYSET_ORDERING)[:INDEX_POST_LIMIT]
+        ),
+        # Страница поста для анонимного посетителя: валидаторы
+        # и сам пост, как в post_validators и post_detail
+        lambda: post_updated_at(anonymous, 0, using=alias),
+        post_detail,
+    ]
+
+
+@receiver(connection_created)
+def warm_up_connection(sender, connection, **kwargs) -> None:
+    if not getattr(settings, 'BLOG_WARM_UP_CONNECTIONS', False):
+        return
+    try:
+        for query in warm_up_queries(connection.alias):
+            query()
+    except DatabaseError:
+        # База ещё не создана или не применены миграции: прогревать
+        # нечего, например при первом migrate.
+        pass
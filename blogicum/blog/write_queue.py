@@ -0,0 +1,166 @@
+"""Очередь записей в базу с одним потоком-писателем.
+
+SQLite допускает одного писателя: параллельные транзакции из потоков
+сервера ждут блокировку записи друг за другом и при нагрузке получают
+"database is locked". Если очередь включена, представления отдают
+запись потоку-писателю процесса и ждут её результат. Писатель забирает
+из очереди всё накопившееся (до BATCH_SIZE записей) и выполняет одной
+транзакцией, каждую запись в своей точке сохранения: ошибка одной
+записи не откатывает остальные. Кеш страниц сигналы сбрасывают после
+фиксации всей пачки (transaction.on_commit), и представление получает
+результат записи уже после сброса. До фиксации пачки другие
+соединения видят данные без её записей, поэтому BATCH_SIZE не стоит
+делать большим.
+
+Очередь ограничена MAX_SIZE: если она заполнена дольше TIMEOUT,
+представление получает queue.Full, а не копит запросы без предела.
+Записи из разных процессов сервера по-прежнему конкурируют за
+блокировку базы, поэтому очередь полезна при одном процессе
+с несколькими потоками.
+"""
+
+import queue
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future, TimeoutError
+from typing import TypeVar
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+WRITE_QUEUE_DEFAULTS = {
+    'ENABLED': False,
+    'MAX_SIZE': 1000,
+    'BATCH_SIZE': 100,
+    # Сколько секунд представление ждёт места в очереди и результата
+    'TIMEOUT': 10,
+}
+
+T = TypeVar('T')
+
+_STOP = object()
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+
+def write_queue_settings() -> dict:
+    """Настройки очереди записей с учётом settings.BLOG_WRITE_QUEUE."""
+    return {
+        **WRITE_QUEUE_DEFAULTS,
+        **getattr(settings, 'BLOG_WRITE_QUEUE', {}),
+    }
+
+
+class WriteQueue:
+    """Ограниченная очередь записей и поток-писатель, который
+    запускается при первой записи.
+    """
+
+    def __init__(self, max_size: int, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self._queue = queue.Queue(max_size)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[[], T],
+               timeout: float | None = None) -> 'Future[T]':
+        """Ставит запись в очередь. Если очередь заполнена дольше
+        timeout секунд, выбрасывает queue.Full.
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((func, future), timeout=timeout)
+        return future
+
+    def stop(self) -> None:
+        """Дожидается выполнения поставленных записей и останавливает
+        писателя. Следующая запись запустит его заново.
+        """
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='blog-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = _STOP in batch
+                self._write([item for item in batch if item is not _STOP])
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _write(batch: list[tuple[Callable, Future]]) -> None:
+        batch = [
+            (func, future) for func, future in batch
+            if future.set_running_or_notify_cancel()
+        ]
+        if not batch:
+            return
+        close_old_connections()
+        results = []
+        try:
+            with transaction.atomic():
+                for func, future in batch:
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+def get_write_queue() -> WriteQueue:
+    """Общая для процесса очередь записей."""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            config = write_queue_settings()
+            _write_queue = WriteQueue(config['MAX_SIZE'],
+                                      config['BATCH_SIZE'])
+        return _write_queue
+
+
+def run_write(func: Callable[[], T]) -> T:
+    """Выполняет запись func в транзакции и возвращает её результат:
+    через поток-писатель, если очередь включена, иначе в текущем
+    потоке.
+    """
+    config = write_queue_settings()
+    if not config['ENABLED']:
+        with transaction.atomic():
+            return func()
+    future = get_write_queue().submit(func, config['TIMEOUT'])
+    try:
+        return future.result(config['TIMEOUT'])
+    except TimeoutError:
+        # Если писатель ещё не взял запись, она не выполнится.
+        future.cancel()
+        raise
@@ -0,0 +1,171 @@
+"""Middleware проекта."""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.db import connections
+
+from .routers import reset_read_only, set_read_only
+from .slow_queries import SlowQueryRecorder, slow_queries_settings
+from .timing import RequestTimings, server_timing_settings, url_server_timing
+
+timing_logger = logging.getLogger('blogicum.server_timing')
+
+# Сколько секунд после записи пользователь читает из основной базы
+READ_AFTER_WRITE_SECONDS = 5
+READ_AFTER_WRITE_COOKIE = 'primary_db'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class LazySessionMiddleware(SessionMiddleware):
+    """SessionMiddleware, который не добавляет Vary: Cookie ответам
+    запросов без сессионной куки.
+
+    Шаблоны всегда читают user и messages, из-за чего сессия
+    считается прочитанной на каждой странице, и стандартный
+    SessionMiddleware добавляет Vary: Cookie, мешая кешировать
+    анонимные страницы в прокси и браузере. Без куки сессии нет,
+    и её чтение ничего не меняет в ответе: ни запросов к таблице
+    сессий, ни заголовка Vary. Если за запрос в сессию что-то
+    записали (вход, сообщение), ответ обрабатывается как обычно.
+    """
+
+    def process_request(self, request) -> None:
+        request.has_session_cookie = (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+        )
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if (
+            session is not None
+            and not request.has_session_cookie
+            and not session.modified
+            and session.is_empty()
+        ):
+            session.accessed = False
+        return super().process_response(request, response)
+
+
+class ReadOnlyRoutingMiddleware:
+    """Отправляет чтение GET-запросов на соединение только для чтения
+    (см. blogicum/routers.py).
+
+    Админка и небезопасные методы работают с основной базой. После
+    небезопасного запроса пользователь получает куку, и ещё
+    READ_AFTER_WRITE_SECONDS секунд его запросы тоже читают из
+    основной базы, чтобы он сразу увидел свой пост или комментарий.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        read_only = (
+            request.method in SAFE_METHODS
+            and READ_AFTER_WRITE_COOKIE not in request.COOKIES
+            and not request.path.startswith('/admin/')
+        )
+        token = set_read_only(read_only)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_read_only(token)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                READ_AFTER_WRITE_COOKIE, '1',
+                max_age=getattr(settings, 'READ_AFTER_WRITE_SECONDS',
+                                READ_AFTER_WRITE_SECONDS),
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+class ServerTimingMiddleware:
+    """Добавляет ответу заголовок Server-Timing с числом SQL-запросов,
+    временем в базе, рендеринга шаблонов и всего запроса, и по
+    желанию пишет те же замеры строкой в лог blogicum.server_timing.
+
+    Общие настройки — settings.SERVER_TIMING, настройки отдельных
+    страниц — словари server_timing в модулях URL по имени страницы,
+    например {'index': {'LOG': True}} в blog/urls.py.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not server_timing_settings()['ENABLED']:
+            return self.get_response(request)
+        timings = RequestTimings()
+        token = timings.activate()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timings.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            timings.deactivate(token)
+        total = time.perf_counter() - start
+
+        options = self.options(request)
+        if options['ENABLED']:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={timings.db * 1000:.1f};'
+                f'desc="{timings.queries} queries"',
+                f'tpl;dur={timings.templates * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        if options['LOG']:
+            match = request.resolver_match
+            timing_logger.info(
+                '%s %s %s queries=%d db_ms=%.1f tpl_ms=%.1f total_ms=%.1f',
+                request.method, match.view_name if match else request.path,
+                response.status_code, timings.queries, timings.db * 1000,
+                timings.templates * 1000, total * 1000,
+                extra={
+                    'view_name': match.view_name if match else None,
+                    'status': response.status_code,
+                    'queries': timings.queries,
+                    'db_ms': round(timings.db * 1000, 1),
+                    'template_ms': round(timings.templates * 1000, 1),
+                    'total_ms': round(total * 1000, 1),
+                },
+            )
+        return response
+
+    @staticmethod
+    def options(request) -> dict:
+        options = server_timing_settings()
+        match = request.resolver_match
+        if match is not None:
+            options.update(
+                url_server_timing(getattr(request, 'urlconf', None))
+                .get(match.view_name, {})
+            )
+        return options
+
+
+class SlowQueryMiddleware:
+    """Пишет в журнал медленные SQL-запросы страницы
+    (см. blogicum/slow_queries.py).
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not slow_queries_settings()['ENABLED']:
+            return self.get_response(request)
+        recorder = SlowQueryRecorder(request)
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            return self.get_response(request)
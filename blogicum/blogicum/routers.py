@@ -0,0 +1,46 @@
+"""Маршрутизация чтения из базы на соединение только для чтения.
+
+ReadOnlyRoutingMiddleware отмечает запросы, которые только читают
+данные, и на время их обработки роутер отправляет чтение на псевдоним
+settings.READ_ONLY_DATABASE. Запись всегда идёт в default.
+"""
+
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_read_only = ContextVar('read_only_request', default=False)
+
+
+def read_only_alias() -> str:
+    return getattr(settings, 'READ_ONLY_DATABASE', 'readonly')
+
+
+def set_read_only(value: bool):
+    """Отмечает текущий запрос как только читающий; возвращает токен
+    для reset_read_only.
+    """
+    return _read_only.set(value)
+
+
+def reset_read_only(token) -> None:
+    _read_only.reset(token)
+
+
+class ReadOnlyRouter:
+    """Чтение в запросах только на чтение идёт на READ_ONLY_DATABASE,
+    остальное — на default.
+    """
+
+    def db_for_read(self, model, **hints) -> str | None:
+        return read_only_alias() if _read_only.get() else None
+
+    def db_for_write(self, model, **hints) -> str:
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        # Оба псевдонима открывают одну и ту же базу.
+        return True
+
+    def allow_migrate(self, db: str, app_label: str, **hints) -> bool:
+        return db != read_only_alias()
@@ -30,8 +30,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Журнал медленных запросов снаружи Server-Timing: время EXPLAIN
+    # не попадает в замер времени базы.
+    'blogicum.middleware.SlowQueryMiddleware',
+    'blogicum.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    'blogicum.middleware.LazySessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -45,7 +50,7 @@ TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blogicum.timing.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -70,6 +75,46 @@ DATABASES = {
 }
 
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Общий для всех пользователей кеш страниц, см. blog/cache.py
+BLOG_PAGE_CACHE = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'default',
+    'TIMEOUT': 300,
+    'LIST_TIMEOUT': None,
+    'CARD_TIMEOUT': 24 * 60 * 60,
+}
+
+# Заголовок Server-Timing с замерами запроса, см. blogicum/middleware.py
+SERVER_TIMING = {
+    'ENABLED': True,
+    'LOG': False,
+}
+
+# Журнал медленных SQL-запросов, см. blogicum/slow_queries.py.
+# В разработке записи выводятся в консоль; файл журнала для команды
+# slow_queries (SLOW_QUERY_LOG) настроен в settings_production.
+SLOW_QUERIES = {
+    'ENABLED': True,
+    'THRESHOLD_MS': 100,
+    'EXPLAIN': True,
+    'LOG_PARAMS': False,
+}
+
+# Очередь записей с одним потоком-писателем, см. blog/write_queue.py
+BLOG_WRITE_QUEUE = {
+    'ENABLED': False,
+    'MAX_SIZE': 1000,
+    'BATCH_SIZE': 100,
+    'TIMEOUT': 10,
+}
+
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
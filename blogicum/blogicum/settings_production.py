@@ -0,0 +1,221 @@
+"""Настройки продакшна.
+
+Подключаются через DJANGO_SETTINGS_MODULE=blogicum.settings_production
+и дополняют общие настройки из settings.py значениями из окружения.
+"""
+
+import os
+from pathlib import Path
+
+from .settings import *  # noqa: F401, F403
+from .settings import BASE_DIR, CACHES, DATABASES, MIDDLEWARE
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split()
+
+
+# PRAGMA, выполняемые на каждом новом соединении с SQLite:
+# - WAL: читатели не блокируются писателем и наоборот;
+# - synchronous=NORMAL: в режиме WAL сохраняет целостность базы,
+#   fsync делается только при checkpoint;
+# - busy_timeout: ждать освобождения блокировки записи, а не сразу
+#   отвечать "database is locked";
+# - mmap_size, cache_size (в КиБ, если отрицательный), temp_store:
+#   меньше системных вызовов при чтении и сортировках.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+SQLITE_PATH = Path(
+    os.environ.get('DJANGO_SQLITE_PATH', BASE_DIR / 'db.sqlite3')
+).resolve()
+
+
+def sqlite_init_command(pragmas: dict) -> str:
+    return ';'.join(
+        f'PRAGMA {name}={value}' for name, value in pragmas.items()
+    )
+
+
+# Соединение живёт между запросами до CONN_MAX_AGE секунд; в начале
+# каждого следующего запроса Django проверяет, что оно ещё работает.
+CONN_MAX_AGE = int(os.environ.get('DJANGO_CONN_MAX_AGE', 600))
+
+# Сколько подготовленных выражений sqlite3 хранит на соединение
+CACHED_STATEMENTS = 256
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'NAME': SQLITE_PATH,
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': sqlite_init_command(SQLITE_PRAGMAS),
+            # Транзакция сразу берёт блокировку записи: ожидание по
+            # busy_timeout вместо ошибки при повышении блокировки
+            # читающей транзакции до пишущей.
+            'transaction_mode': 'IMMEDIATE',
+            'cached_statements': CACHED_STATEMENTS,
+        },
+    },
+    # Тот же файл, открытый только для чтения: страницы, которые
+    # только читают, не могут ничего записать и не занимают
+    # соединения, через которые идёт запись.
+    'readonly': {
+        **DATABASES['default'],
+        'NAME': f'{SQLITE_PATH.as_uri()}?mode=ro',
+        'CONN_MAX_AGE': CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'uri': True,
+            'init_command': sqlite_init_command({
+                **{name: value for name, value in SQLITE_PRAGMAS.items()
+                   if name != 'journal_mode'},
+                'query_only': 1,
+            }),
+            'cached_statements': CACHED_STATEMENTS,
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+
+# Частые запросы выполняются при открытии соединения, см. blog/warmup.py
+BLOG_WARM_UP_CONNECTIONS = True
+
+DATABASE_ROUTERS = ['blogicum.routers.ReadOnlyRouter']
+
+READ_ONLY_DATABASE = 'readonly'
+
+# Сколько секунд после записи пользователь читает из default
+READ_AFTER_WRITE_SECONDS = 5
+
+MIDDLEWARE = [
+    *MIDDLEWARE[:3],
+    'blogicum.middleware.ReadOnlyRoutingMiddleware',
+    *MIDDLEWARE[3:],
+]
+
+
+# Сессии не читаются из SQLite на каждом запросе авторизованного
+# пользователя:
+# - cached_db (по умолчанию) читает сессию из кеша и пишет в кеш и базу,
+#   в базу обращается только при промахе кеша;
+# - signed_cookies хранит сессию в подписанной куке и не пишет в базу
+#   даже при входе, но сессию нельзя завершить на сервере до истечения
+#   SESSION_COOKIE_AGE.
+SESSION_BACKENDS = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SESSION_ENGINE = SESSION_BACKENDS[
+    os.environ.get('DJANGO_SESSION_BACKEND', 'cached_db')
+]
+
+CACHE_DIR = Path(os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'))
+REDIS_URL = os.environ.get('DJANGO_REDIS_URL')
+
+# Кеши общие для всех процессов сервера и для планировщика
+# publish_scheduled: сигналы и планировщик сбрасывают кеш страниц,
+# количества постов и дату ближайшей публикации в одном процессе,
+# а страницы отдают все. С кешем в памяти процесса списки постов,
+# которые хранятся без ограничения по времени (LIST_TIMEOUT=None),
+# в остальных процессах не обновились бы никогда.
+# Сессии лежат в отдельном кеше, чтобы страницы блога их не вытесняли;
+# выход из аккаунта должен удалить сессию для всех процессов.
+#
+# В продакшне кеш — Redis (DJANGO_REDIS_URL). Файловый кеш остаётся
+# для установки на одном сервере без Redis: FileBasedCache.set()
+# перечисляет весь каталог при каждой записи, чтобы проверить
+# MAX_ENTRIES, поэтому число файлов держится небольшим.
+if REDIS_URL:
+    CACHES = {
+        **CACHES,
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'blogicum',
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'blogicum-sessions',
+        },
+    }
+else:
+    CACHES = {
+        **CACHES,
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': CACHE_DIR / 'default',
+            'OPTIONS': {'MAX_ENTRIES': 2000},
+        },
+        'sessions': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get(
+                'DJANGO_SESSION_CACHE_DIR', CACHE_DIR / 'sessions'
+            ),
+            'OPTIONS': {'MAX_ENTRIES': 2000},
+        },
+    }
+
+SESSION_CACHE_ALIAS = 'sessions'
+
+SESSION_COOKIE_AGE = 14 * 24 * 60 * 60
+
+SESSION_COOKIE_SECURE = True
+
+SESSION_COOKIE_HTTPONLY = True
+
+CSRF_COOKIE_SECURE = True
+
+
+SLOW_QUERY_LOG = Path(
+    os.environ.get('DJANGO_SLOW_QUERY_LOG',
+                   BASE_DIR / 'logs' / 'slow_queries.log')
+)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timing': {'format': '%(asctime)s %(name)s %(message)s'},
+        'json': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'timing',
+        },
+        # Одна JSON-строка на медленный запрос, файлы по 10 МБ
+        'slow_queries': {
+            'class': 'blogicum.slow_queries.LogFileHandler',
+            'filename': SLOW_QUERY_LOG,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'json',
+        },
+    },
+    'loggers': {
+        'blogicum.server_timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        'blogicum.slow_queries': {
+            'handlers': ['slow_queries'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
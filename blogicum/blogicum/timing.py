@@ -0,0 +1,109 @@
+"""Замеры времени запроса для заголовка Server-Timing.
+
+RequestTimings копит за запрос число SQL-запросов, время в базе
+и время рендеринга шаблонов. Запросы к базе считает execute_wrapper
+соединений (ServerTimingMiddleware), шаблоны — бэкенд
+TimedDjangoTemplates. Если запрос не замеряется, бэкенд только
+проверяет пустую контекстную переменную.
+"""
+
+import time
+from contextvars import ContextVar
+from functools import cache
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+from django.urls import URLResolver, get_resolver
+
+SERVER_TIMING_DEFAULTS = {
+    'ENABLED': True,
+    # Писать ли строку с замерами в лог blogicum.server_timing
+    'LOG': False,
+}
+
+_current = ContextVar('request_timings', default=None)
+
+
+def server_timing_settings() -> dict:
+    """Настройки Server-Timing с учётом settings.SERVER_TIMING."""
+    return {
+        **SERVER_TIMING_DEFAULTS,
+        **getattr(settings, 'SERVER_TIMING', {}),
+    }
+
+
+@cache
+def url_server_timing(urlconf: str | None = None) -> dict[str, dict]:
+    """Настройки Server-Timing отдельных страниц из словарей
+    server_timing модулей URL, ключи вида 'blog:index'.
+    """
+    resolver = get_resolver(urlconf)
+    options = {
+        name: value for name, value
+        in getattr(resolver.urlconf_module, 'server_timing', {}).items()
+    }
+    for pattern in resolver.url_patterns:
+        if isinstance(pattern, URLResolver) and pattern.namespace:
+            options.update({
+                f'{pattern.namespace}:{name}': value for name, value
+                in getattr(pattern.urlconf_module, 'server_timing',
+                           {}).items()
+            })
+    return options
+
+
+class RequestTimings:
+    """Замеры одного запроса, время в секундах."""
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db = 0.0
+        self.templates = 0.0
+        self._template_depth = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        """execute_wrapper соединения: считает запрос и его время."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - start
+            self.queries += 1
+
+    def activate(self):
+        return _current.set(self)
+
+    @staticmethod
+    def deactivate(token) -> None:
+        _current.reset(token)
+
+
+class TimedTemplate(Template):
+    """Шаблон, время рендеринга которого попадает в замеры запроса.
+    Вложенный рендеринг (render_to_string внутри шаблона) не
+    считается второй раз.
+    """
+
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        timings._template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings._template_depth -= 1
+            if not timings._template_depth:
+                timings.templates += time.perf_counter() - start
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates с замером рендеринга шаблонов."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -1,9 +1,19 @@
 from django.urls import path
+
+from blog.cache import cache_shared_page
 from .views import AboutPage, RulesPage
 
 app_name = 'pages'
 
 urlpatterns = [
-    path('about/', AboutPage.as_view(), name='about'),
-    path('rules/', RulesPage.as_view(), name='rules'),
+    path(
+        'about/',
+        cache_shared_page(AboutPage.as_view()),
+        name='about'
+    ),
+    path(
+        'rules/',
+        cache_shared_page(RulesPage.as_view()),
+        name='rules'
+    ),
 ]
@@ -26,6 +26,9 @@ class PostModelAdapter(StudentModelAdapter):
         return [
             "id",
             "created_at",
+            "updated_at",
+            "excerpt",
+            "text_html",
             "is_published",
             "title",
             "text",
@@ -19,6 +19,7 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
@@ -26,6 +27,8 @@ from django.test import override_settings
 from django.test.client import Client
 from mixer.backend.django import mixer as _mixer
 
+from blog.cache import reset_page_cache_stats
+
 N_PER_FIXTURE = 3
 N_PER_PAGE = 10
 COMMENT_TEXT_DISPLAY_LEN_FOR_TESTS = 50
@@ -41,6 +44,24 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    reset_page_cache_stats()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def page_cache(request):
+    """Кеш страниц включён только в тестах с меткой page_cache: страница
+    из кеша отдаётся без контекста шаблона, который проверяют
+    остальные тесты.
+    """
+    enabled = request.node.get_closest_marker("page_cache") is not None
+    with override_settings(BLOG_PAGE_CACHE={"ENABLED": enabled}):
+        yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,380 @@
+import importlib
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.cache import get_page_cache, page_cache_stats
+from blog.checks import check_page_cache_is_fast, check_page_cache_is_shared
+from blog.models import DUE_PUBLICATION_RECHECK, Post
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db, pytest.mark.page_cache]
+
+
+def _get_twice(client: Client, url: str):
+    first = client.get(url)
+    second = client.get(url)
+    return first, second
+
+
+@pytest.mark.parametrize(
+    "url_template",
+    ["/", "/category/{category}/", "/posts/{post}/", "/pages/about/"],
+)
+def test_anonymous_pages_are_cached(
+        post_with_published_location, published_category, unlogged_client,
+        django_assert_num_queries, url_template
+):
+    url = url_template.format(
+        category=published_category.slug,
+        post=post_with_published_location.id,
+    )
+    unlogged_client.get(url)
+    with django_assert_num_queries(0):
+        response = unlogged_client.get(url)
+    assert response.status_code == 200, (
+        f"Убедитесь, что страница `{url}` для анонимного посетителя "
+        "повторно отдаётся из кеша без запросов к БД."
+    )
+    assert page_cache_stats() == {"hits": 1, "misses": 1}
+
+
+def test_users_share_page_with_own_parts(
+        mixer: Mixer, post_with_published_location, user, another_user,
+        unlogged_client, user_client, another_user_client
+):
+    post = post_with_published_location
+    mixer.blend("blog.Comment", post=post, author=user)
+    url = f"/posts/{post.id}/"
+    unlogged_client.get(url)
+    author_page = user_client.get(url).content.decode()
+    reader_page = another_user_client.get(url).content.decode()
+    assert page_cache_stats() == {"hits": 2, "misses": 1}, (
+        "Убедитесь, что авторизованные пользователи получают страницу "
+        "из общего кеша."
+    )
+    def header_link(username):
+        return f'href="/profile/{username}/">{username}'
+
+    assert header_link(user.username) in author_page
+    assert header_link(another_user.username) not in author_page
+    assert header_link(another_user.username) in reader_page, (
+        "Убедитесь, что шапка страницы из кеша выводит текущего "
+        "пользователя."
+    )
+    for page, is_author in ((author_page, True), (reader_page, False)):
+        assert ("Отредактировать публикацию" in page) is is_author
+        assert ("Отредактировать комментарий" in page) is is_author
+        assert "csrfmiddlewaretoken" in page
+    assert "page-cache-hole" not in author_page + reader_page
+
+
+def test_hidden_post_is_not_cached(post_with_published_location, user_client):
+    post = post_with_published_location
+    post.is_published = False
+    post.save()
+    _get_twice(user_client, f"/posts/{post.id}/")
+    assert page_cache_stats() == {"hits": 0, "misses": 2}, (
+        "Убедитесь, что скрытый пост, доступный только автору, не "
+        "попадает в общий кеш страниц."
+    )
+
+
+def test_comment_invalidates_post_and_lists(
+        mixer: Mixer, post_with_published_location, post_of_another_author,
+        unlogged_client, django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    urls = ("/", f"/posts/{post.id}/", f"/posts/{post_of_another_author.id}/")
+    for url in urls:
+        unlogged_client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend("blog.Comment", post=post, text="Свежий комментарий")
+
+    assert "(1)" in unlogged_client.get("/").content.decode(), (
+        "Убедитесь, что новый комментарий сбрасывает кеш главной страницы."
+    )
+    assert "Свежий комментарий" in unlogged_client.get(
+        f"/posts/{post.id}/"
+    ).content.decode(), (
+        "Убедитесь, что новый комментарий сбрасывает кеш страницы поста."
+    )
+    stats_before = page_cache_stats()
+    unlogged_client.get(f"/posts/{post_of_another_author.id}/")
+    assert page_cache_stats()["hits"] == stats_before["hits"] + 1, (
+        "Убедитесь, что комментарий не сбрасывает кеш страниц других постов."
+    )
+
+
+def test_invalidation_waits_for_commit(
+        mixer: Mixer, post_with_published_location, unlogged_client,
+        django_capture_on_commit_callbacks
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    unlogged_client.get(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend(
+            "blog.Comment", post=post_with_published_location,
+            text="Свежий комментарий"
+        )
+        unlogged_client.get(url)
+        assert page_cache_stats()["hits"] == 1, (
+            "Убедитесь, что кеш страниц сбрасывается только после "
+            "фиксации транзакции: иначе страница, отрендеренная до "
+            "COMMIT, закешируется со старыми данными под новыми "
+            "версиями тегов."
+        )
+    assert "Свежий комментарий" in unlogged_client.get(url).content.decode()
+
+
+def test_write_during_render_is_not_cached_stale(
+        mixer: Mixer, post_with_published_location, user, published_category,
+        unlogged_client, django_capture_on_commit_callbacks
+):
+    written = []
+
+    def write_after_list_query(execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if '"blog_post"."title"' in sql and not written:
+            written.append(True)
+            with django_capture_on_commit_callbacks(execute=True):
+                mixer.blend(
+                    "blog.Post", author=user, category=published_category,
+                    is_published=True, pub_date=timezone.now(),
+                    title="Пост, сохранённый во время рендеринга",
+                )
+        return result
+
+    with connection.execute_wrapper(write_after_list_query):
+        first = unlogged_client.get("/").content.decode()
+    assert written
+    assert "Пост, сохранённый во время рендеринга" not in first
+    assert "Пост, сохранённый во время рендеринга" in unlogged_client.get(
+        "/"
+    ).content.decode(), (
+        "Убедитесь, что страница, во время рендеринга которой "
+        "зафиксирована запись, не отдаётся из кеша: сброс тегов должен "
+        "сравниваться со временем начала рендеринга."
+    )
+
+
+def test_post_save_invalidates_only_its_author_profile(
+        mixer: Mixer, post_with_published_location, post_of_another_author,
+        user, another_user, published_category, unlogged_client,
+        django_capture_on_commit_callbacks
+):
+    own_profile = f"/profile/{user.username}/"
+    other_profile = f"/profile/{another_user.username}/"
+    unlogged_client.get(own_profile)
+    unlogged_client.get(other_profile)
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, title="Новый пост автора",
+        )
+    assert "Новый пост автора" in unlogged_client.get(
+        own_profile
+    ).content.decode(), (
+        "Убедитесь, что новый пост сбрасывает кеш профиля его автора."
+    )
+    stats_before = page_cache_stats()
+    unlogged_client.get(other_profile)
+    assert page_cache_stats()["hits"] == stats_before["hits"] + 1, (
+        "Убедитесь, что пост одного автора не сбрасывает кеш профилей "
+        "других авторов."
+    )
+
+
+@pytest.mark.parametrize("model", ["category", "location", "author"])
+def test_related_changes_invalidate_post_page(
+        post_with_published_location, unlogged_client, model,
+        django_capture_on_commit_callbacks
+):
+    post = post_with_published_location
+    url = f"/posts/{post.id}/"
+    unlogged_client.get(url)
+    related = getattr(post, model)
+    if model == "author":
+        related.username = "renamed_author"
+    else:
+        setattr(related, "name" if model == "location" else "title",
+                "Переименовано")
+    with django_capture_on_commit_callbacks(execute=True):
+        related.save()
+
+    content = unlogged_client.get(url).content.decode()
+    assert "renamed_author" in content or "Переименовано" in content, (
+        f"Убедитесь, что изменение `{model}` сбрасывает кеш страниц, "
+        "на которых выводится пост."
+    )
+
+
+@pytest.mark.parametrize("future_delta", [None, timedelta(hours=1)])
+def test_list_page_expires_at_next_publication(
+        mixer: Mixer, post_with_published_location, user, published_category,
+        unlogged_client, future_delta
+):
+    if future_delta:
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, pub_date=timezone.now() + future_delta,
+        )
+    page_cache = get_page_cache()
+    with patch.object(page_cache, "set", wraps=page_cache.set) as cache_set:
+        unlogged_client.get("/")
+    page_timeouts = [
+        call.args[2] for call in cache_set.call_args_list
+        if call.args[0].startswith("blog:page-cache:page:")
+    ]
+    assert len(page_timeouts) == 1
+    if future_delta is None:
+        assert page_timeouts[0] is None, (
+            "Убедитесь, что без отложенных публикаций список постов "
+            "хранится в кеше без ограничения по времени."
+        )
+    else:
+        expected = future_delta.total_seconds()
+        assert expected - 5 <= page_timeouts[0] <= expected, (
+            "Убедитесь, что список постов хранится в кеше ровно до "
+            "ближайшей отложенной публикации."
+        )
+
+
+def test_list_page_expires_soon_while_publication_is_due(
+        mixer: Mixer, post_with_published_location, user, published_category,
+        unlogged_client
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+    )
+    # Дата наступила, но планировщик ещё не открыл пост
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(seconds=1)
+    )
+    page_cache = get_page_cache()
+    with patch.object(page_cache, "set", wraps=page_cache.set) as cache_set:
+        unlogged_client.get("/")
+    page_timeouts = [
+        call.args[2] for call in cache_set.call_args_list
+        if call.args[0].startswith("blog:page-cache:page:")
+    ]
+    assert len(page_timeouts) == 1
+    assert 0 < page_timeouts[0] <= DUE_PUBLICATION_RECHECK, (
+        "Убедитесь, что пока планировщик не открыл наступивший "
+        "отложенный пост, список постов хранится в кеше лишь "
+        "несколько секунд."
+    )
+
+
+def _rendered_cards(response) -> int:
+    return sum(
+        template.name == "includes/post_card.html"
+        for template in response.templates
+    )
+
+
+def test_post_cards_are_cached(
+        mixer: Mixer, user, published_category, user_client,
+        django_capture_on_commit_callbacks
+):
+    posts = mixer.cycle(N_PER_PAGE).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    # Авторизованному пользователю страница не берётся из кеша страниц,
+    # но карточки берутся из кеша фрагментов.
+    assert _rendered_cards(user_client.get("/")) == N_PER_PAGE
+    assert _rendered_cards(user_client.get("/")) == 0, (
+        "Убедитесь, что повторный рендеринг списка берёт HTML карточек "
+        "постов из кеша, не рендеря шаблон карточки."
+    )
+
+    published_category.title = "Новое название категории"
+    posts[0].title = "Новый заголовок"
+    with django_capture_on_commit_callbacks(execute=True):
+        published_category.save()
+        posts[0].save()
+    response = user_client.get("/")
+    content = response.content.decode()
+    assert "Новый заголовок" in content
+    assert content.count("Новое название категории") == N_PER_PAGE, (
+        "Убедитесь, что изменение поста или его категории обновляет "
+        "закешированные карточки."
+    )
+
+
+def test_deploy_check_requires_shared_page_cache(monkeypatch, tmp_path):
+    assert [error.id for error in check_page_cache_is_shared(None)] == [
+        "blog.E001"
+    ], (
+        "Убедитесь, что `check --deploy` не пропускает кеш страниц в памяти "
+        "процесса при списках без ограничения по времени."
+    )
+    with override_settings(BLOG_PAGE_CACHE={"LIST_TIMEOUT": 300}):
+        assert not check_page_cache_is_shared(None)
+
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "test")
+    monkeypatch.setenv("DJANGO_CACHE_DIR", str(tmp_path))
+    production = importlib.import_module("blogicum.settings_production")
+    with override_settings(CACHES=production.CACHES):
+        assert not check_page_cache_is_shared(None), (
+            "Убедитесь, что в продакшне кеш страниц общий для всех "
+            "процессов сервера."
+        )
+
+
+def test_page_cache_stats_are_not_written_to_cache(
+        post_with_published_location, unlogged_client
+):
+    unlogged_client.get("/")
+    page_cache = get_page_cache()
+    with patch.object(page_cache, "set", wraps=page_cache.set) as cache_set, \
+            patch.object(page_cache, "incr") as cache_incr, \
+            patch.object(page_cache, "add") as cache_add:
+        unlogged_client.get("/")
+    assert page_cache_stats()["hits"] == 1
+    assert not (
+        cache_set.called or cache_incr.called or cache_add.called
+    ), (
+        "Убедитесь, что попадание в кеш страниц ничего не пишет в кеш: "
+        "счётчики попаданий ведутся в памяти процесса."
+    )
+
+
+def test_production_cache_is_redis_or_small_file_cache(
+        monkeypatch, tmp_path
+):
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "test")
+    monkeypatch.setenv("DJANGO_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("DJANGO_REDIS_URL", raising=False)
+    production = importlib.reload(
+        importlib.import_module("blogicum.settings_production")
+    )
+    for alias in ("default", "sessions"):
+        assert production.CACHES[alias]["OPTIONS"]["MAX_ENTRIES"] <= 2000, (
+            "Убедитесь, что файловый кеш продакшна ограничен небольшим "
+            "числом записей."
+        )
+    with override_settings(CACHES=production.CACHES):
+        assert [
+            warning.id for warning in check_page_cache_is_fast(None)
+        ] == ["blog.W001"], (
+            "Убедитесь, что `check --deploy` предупреждает о файловом "
+            "кеше страниц."
+        )
+
+    monkeypatch.setenv("DJANGO_REDIS_URL", "redis://127.0.0.1:6379/1")
+    production = importlib.reload(production)
+    assert {
+        production.CACHES[alias]["BACKEND"] for alias in ("default", "sessions")
+    } == {"django.core.cache.backends.redis.RedisCache"}, (
+        "Убедитесь, что с `DJANGO_REDIS_URL` продакшн кеширует в Redis."
+    )
+    with override_settings(CACHES=production.CACHES):
+        assert not check_page_cache_is_fast(None)
@@ -0,0 +1,76 @@
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _stored_count(post: Post) -> int:
+    post.refresh_from_db(fields=["comment_count"])
+    return post.comment_count
+
+
+def test_comment_count_follows_views(
+        user_client, post_with_published_location
+):
+    post = post_with_published_location
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "Первый"})
+    user_client.post(f"/posts/{post.id}/comment/", data={"text": "Второй"})
+    assert _stored_count(post) == 2, (
+        "Убедитесь, что добавление комментария увеличивает счётчик "
+        "комментариев поста."
+    )
+
+    comment = Comment.objects.filter(post=post).first()
+    user_client.post(f"/posts/{post.id}/delete_comment/{comment.id}/")
+    assert _stored_count(post) == 1, (
+        "Убедитесь, что удаление комментария уменьшает счётчик "
+        "комментариев поста."
+    )
+
+
+def test_comment_count_follows_cascade_delete(
+        mixer: Mixer, post_with_published_location, another_user
+):
+    post = post_with_published_location
+    mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    mixer.blend("blog.Comment", post=post)
+    assert _stored_count(post) == 4
+
+    another_user.delete()
+    assert _stored_count(post) == 1, (
+        "Убедитесь, что при удалении пользователя счётчики комментариев "
+        "постов уменьшаются на число его комментариев."
+    )
+
+
+def test_recount_comments_repairs_drift(
+        mixer: Mixer, post_with_published_location
+):
+    post = post_with_published_location
+    mixer.cycle(2).blend("blog.Comment", post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=100)
+
+    call_command("recount_comments")
+    assert _stored_count(post) == 2, (
+        "Убедитесь, что команда `recount_comments` исправляет "
+        "разошедшиеся счётчики комментариев."
+    )
+
+
+def test_attach_comment_counts_counts_only_page(
+        mixer: Mixer, post_with_published_location, post_of_another_author,
+        django_assert_num_queries
+):
+    from blog.views import attach_comment_counts
+
+    mixer.cycle(3).blend("blog.Comment", post=post_with_published_location)
+    posts = [post_with_published_location, post_of_another_author]
+    with django_assert_num_queries(1):
+        attach_comment_counts(posts)
+    assert [post.comment_count for post in posts] == [3, 0], (
+        "Убедитесь, что `attach_comment_counts` одним запросом проставляет "
+        "постам количество их комментариев."
+    )
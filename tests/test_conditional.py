@@ -0,0 +1,66 @@
+import pytest
+from django.test import override_settings
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db, pytest.mark.page_cache]
+
+
+def _urls(post, category):
+    return ("/", f"/category/{category.slug}/", f"/posts/{post.id}/")
+
+
+@pytest.mark.parametrize("url_index", [0, 1, 2])
+@pytest.mark.parametrize("cached", [True, False], ids=["cached", "uncached"])
+def test_not_modified_is_not_rendered(
+        post_with_published_location, published_category, unlogged_client,
+        url_index, cached
+):
+    url = _urls(post_with_published_location, published_category)[url_index]
+    with override_settings(BLOG_PAGE_CACHE={"ENABLED": cached}):
+        etag = unlogged_client.get(url)["ETag"]
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, (
+        f"Убедитесь, что страница `{url}` отвечает 304 на запрос с "
+        "актуальным ETag."
+    )
+    assert not response.templates, (
+        f"Убедитесь, что при ответе 304 на `{url}` шаблоны не рендерятся."
+    )
+
+
+def test_last_modified_for_anonymous(
+        post_with_published_location, unlogged_client
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    last_modified = unlogged_client.get(url)["Last-Modified"]
+    response = unlogged_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304
+    assert not response.templates
+
+
+def test_comment_changes_validators(
+        mixer: Mixer, post_with_published_location, published_category,
+        unlogged_client, django_capture_on_commit_callbacks
+):
+    urls = _urls(post_with_published_location, published_category)
+    etags = {url: unlogged_client.get(url)["ETag"] for url in urls}
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend("blog.Comment", post=post_with_published_location)
+    for url, etag in etags.items():
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f"Убедитесь, что новый комментарий меняет ETag страницы `{url}`."
+        )
+
+
+def test_etag_depends_on_user(
+        post_with_published_location, unlogged_client, user_client
+):
+    url = f"/posts/{post_with_published_location.id}/"
+    etag = unlogged_client.get(url)["ETag"]
+    response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, (
+        "Убедитесь, что ETag страницы зависит от пользователя: анонимная "
+        "версия не должна подходить авторизованному."
+    )
+    assert not response.has_header("Last-Modified")
@@ -0,0 +1,75 @@
+import importlib
+from io import StringIO
+
+import pytest
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = " ".join(f"слово{i}" for i in range(500))
+
+
+def test_excerpt_is_filled_on_save(mixer: Mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, text=LONG_TEXT,
+    )
+    assert post.excerpt == " ".join(LONG_TEXT.split()[:10]) + " …"
+
+    post.text = "Новый текст"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == "Новый текст", (
+        "Убедитесь, что анонс пересчитывается при изменении текста поста."
+    )
+
+
+def test_list_pages_do_not_load_text(
+        mixer: Mixer, user, published_category, unlogged_client
+):
+    mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, text=LONG_TEXT,
+    )
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get("/")
+    assert '"blog_post"."text"' not in " ".join(
+        query["sql"] for query in ctx.captured_queries
+    ), "Убедитесь, что списки постов не загружают полный текст постов."
+    assert "слово9 …" in response.content.decode()
+
+
+def test_backfill_excerpts(mixer: Mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        text=LONG_TEXT,
+    )
+    Post.objects.update(excerpt="")
+    out = StringIO()
+    call_command("backfill_excerpts", stdout=out)
+    assert "Заполнено анонсов: 1" in out.getvalue()
+    post.refresh_from_db()
+    assert post.excerpt == post.make_excerpt()
+
+
+def test_migration_fills_existing_excerpts(
+        mixer: Mixer, user, published_category
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, text=LONG_TEXT,
+    )
+    Post.objects.filter(pk=post.pk).update(excerpt="")
+    migration = importlib.import_module("blog.migrations.0009_post_excerpt")
+    migration.fill_excerpt(apps, None)
+    post_excerpt = Post.objects.values_list("excerpt", flat=True).get()
+    assert post_excerpt == post.make_excerpt(), (
+        "Убедитесь, что миграция с полем `excerpt` заполняет анонсы "
+        "уже существующих постов."
+    )
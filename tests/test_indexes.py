@@ -0,0 +1,53 @@
+import pytest
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def _assert_plan_uses_index(queryset: QuerySet, index_name: str):
+    plan = queryset.explain()
+    assert f"USING INDEX {index_name}" in plan, (
+        f"Убедитесь, что запрос использует индекс `{index_name}`. "
+        f"План запроса:\n{plan}"
+    )
+    assert "TEMP B-TREE FOR ORDER BY" not in plan, (
+        "Убедитесь, что сортировка по дате публикации берётся из индекса, "
+        f"а не выполняется отдельно. План запроса:\n{plan}"
+    )
+
+
+def test_published_uses_index():
+    _assert_plan_uses_index(
+        Post.objects.published(), "post_visible_date_idx"
+    )
+
+
+def test_category_posts_use_index(published_category):
+    _assert_plan_uses_index(
+        Post.objects.published().filter(category=published_category),
+        "post_visible_category_date_idx",
+    )
+
+
+def test_author_posts_use_index(user):
+    _assert_plan_uses_index(
+        Post.objects.filter(author=user).order_by("-pub_date"),
+        "post_author_date_idx",
+    )
+
+
+def test_comment_batches_use_index(post_with_published_location):
+    comments = post_with_published_location.comments.order_by(
+        "created_at", "id"
+    )
+    _assert_plan_uses_index(comments, "comment_post_created_idx")
+    now = timezone.now()
+    _assert_plan_uses_index(
+        comments.filter(
+            Q(created_at__gt=now) | Q(id__gt=1), created_at__gte=now
+        ),
+        "comment_post_created_idx",
+    )
@@ -0,0 +1,187 @@
+import re
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.cache import get_page_cache, page_cache_settings
+from blog.models import Post
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+N_POSTS = N_PER_PAGE * 3 + 5
+
+
+@pytest.fixture
+def many_published_posts(mixer: Mixer, user, published_category):
+    return mixer.cycle(N_POSTS).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+    )
+
+
+@pytest.fixture
+def one_numbered_page(monkeypatch):
+    monkeypatch.setattr("blog.views.NUMBERED_PAGES_LIMIT", 1)
+
+
+def _page_ids(response):
+    return [post.id for post in response.context["page_obj"]]
+
+
+def _link(response, param):
+    match = re.search(rf'href="\?{param}=([\w-]+)"', response.content.decode())
+    return match and match.group(1)
+
+
+@pytest.mark.usefixtures("many_published_posts", "one_numbered_page")
+def test_keyset_pagination_walks_whole_list(unlogged_client):
+    expected = list(
+        Post.objects.published().order_by("-pub_date", "-id")
+        .values_list("id", flat=True)
+    )
+    response = unlogged_client.get("/")
+    seen = _page_ids(response)
+    after = _link(response, "after")
+    assert after, (
+        "Убедитесь, что последняя нумерованная страница ссылается на "
+        "следующую страницу через курсор `?after=`."
+    )
+    pages = [seen]
+    while after:
+        with CaptureQueriesContext(connection) as ctx:
+            response = unlogged_client.get(f"/?after={after}")
+        assert not any(
+            "OFFSET" in query["sql"] for query in ctx.captured_queries
+        ), "Убедитесь, что страницы по курсору не используют OFFSET."
+        pages.append(_page_ids(response))
+        after = _link(response, "after")
+    assert sum(pages, []) == expected, (
+        "Убедитесь, что страницы по курсору выводят все посты по порядку "
+        "без пропусков и повторов."
+    )
+
+    before = _link(response, "before")
+    response = unlogged_client.get(f"/?before={before}")
+    assert _page_ids(response) == pages[-2], (
+        "Убедитесь, что ссылка `?before=` ведёт на предыдущую страницу."
+    )
+
+
+@pytest.mark.usefixtures("many_published_posts", "one_numbered_page")
+def test_deep_page_number_is_clamped(unlogged_client):
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get("/?page=4000")
+    assert response.status_code == 200
+    assert len(response.context["page_obj"]) == N_PER_PAGE
+    assert not any(
+        "OFFSET" in query["sql"] for query in ctx.captured_queries
+    ), (
+        "Убедитесь, что номера страниц дальше разрешённых не приводят "
+        "к запросу с OFFSET."
+    )
+
+
+@pytest.mark.usefixtures("many_published_posts")
+@override_settings(BLOG_PAGE_CACHE={"ENABLED": False})
+def test_post_count_is_cached_and_invalidated(
+        mixer: Mixer, unlogged_client, user, published_category,
+        django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    unlogged_client.get("/")
+    with django_assert_num_queries(2):
+        response = unlogged_client.get("/")
+    assert response.status_code == 200, (
+        "Убедитесь, что количество постов главной страницы берётся из кеша "
+        "и повторный запрос выполняет только выборку страницы (и запрос "
+        "даты изменения для ETag)."
+    )
+
+    count = response.context["page_obj"].paginator.count
+    with django_capture_on_commit_callbacks(execute=True):
+        mixer.blend(
+            "blog.Post", author=user, category=published_category,
+            is_published=True, pub_date=timezone.now(),
+        )
+    response = unlogged_client.get("/")
+    assert response.context["page_obj"].paginator.count == count + 1, (
+        "Убедитесь, что сохранение поста сбрасывает закешированное "
+        "количество постов."
+    )
+
+
+@pytest.mark.usefixtures("many_published_posts")
+def test_capped_post_count(unlogged_client, user):
+    with patch("blog.paginators.POST_COUNT_CAP", N_PER_PAGE):
+        response = unlogged_client.get(f"/profile/{user.username}/")
+    paginator = response.context["page_obj"].paginator
+    assert paginator.is_count_capped
+    assert paginator.count_display == f"{N_PER_PAGE}+", (
+        "Убедитесь, что при превышении порога вместо точного количества "
+        "постов выводится порог с плюсом."
+    )
+    assert "Последняя" not in response.content.decode()
+
+
+def _load_more_link(response):
+    match = re.search(
+        r'href="/posts/\d+/comments/\?after=([\w-]+)"',
+        response.content.decode(),
+    )
+    return match and match.group(1)
+
+
+def test_comments_load_more(
+        mixer: Mixer, post_with_published_location, unlogged_client
+):
+    post = post_with_published_location
+    comments = mixer.cycle(5).blend("blog.Comment", post=post)
+    with patch("blog.views.COMMENTS_PER_PAGE", 2):
+        response = unlogged_client.get(f"/posts/{post.id}/")
+        shown = [comment.id for comment in response.context["comments"]]
+        while (after := _load_more_link(response)):
+            response = unlogged_client.get(
+                f"/posts/{post.id}/comments/?after={after}"
+            )
+            assert "<form" not in response.content.decode(), (
+                "Убедитесь, что подгружаемый фрагмент содержит только "
+                "комментарии."
+            )
+            shown += [comment.id for comment in response.context["comments"]]
+    assert shown == [comment.id for comment in comments], (
+        "Убедитесь, что на странице поста выводится первая порция "
+        "комментариев, а остальные подгружаются по ссылке по порядку."
+    )
+
+
+def test_export_comments_streams_json_lines(comment_to_a_post):
+    out = StringIO()
+    call_command("export_comments", stdout=out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1 and str(comment_to_a_post.id) in lines[0]
+
+
+@pytest.mark.page_cache
+@pytest.mark.usefixtures("many_published_posts", "one_numbered_page")
+def test_cursor_pages_expire_from_page_cache(unlogged_client):
+    after = _link(unlogged_client.get("/"), "after")
+    page_cache = get_page_cache()
+    with patch.object(page_cache, "set", wraps=page_cache.set) as cache_set:
+        unlogged_client.get(f"/?after={after}")
+    timeouts = [
+        call.args[2] for call in cache_set.call_args_list
+        if call.args[0].startswith("blog:page-cache:page:")
+    ]
+    assert timeouts == [page_cache_settings()["TIMEOUT"]], (
+        "Убедитесь, что страницы по курсору `?after=` хранятся в кеше "
+        "страниц не дольше `TIMEOUT`: курсоров бесконечно много."
+    )
@@ -0,0 +1,91 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db, pytest.mark.page_cache]
+
+
+def _blend_card_posts(mixer: Mixer, n: int, author, category):
+    """Каждый пост со своим местоположением, чтобы N+1 по связанным
+    объектам был заметен в количестве запросов.
+    """
+    return [
+        mixer.blend(
+            "blog.Post",
+            author=author,
+            category=category,
+            location=mixer.blend("blog.Location", is_published=True),
+            is_published=True,
+        )
+        for _ in range(n)
+    ]
+
+
+def _count_page_queries(client, url: str) -> int:
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.parametrize("n_posts", [1, N_PER_PAGE])
+def test_list_pages_query_count(
+        mixer: Mixer, user, published_category, unlogged_client, n_posts
+):
+    _blend_card_posts(mixer, n_posts, user, published_category)
+    # Страницы и количества постов считаются без кеша; первый запрос
+    # главной и категории - MAX(updated_at) для ETag, последний - дата
+    # ближайшей отложенной публикации для времени жизни кеша.
+    pages = {
+        "/": 4,
+        f"/category/{published_category.slug}/": 5,
+        f"/profile/{user.username}/": 4,
+    }
+    for url, expected in pages.items():
+        cache.clear()
+        n_queries = _count_page_queries(unlogged_client, url)
+        assert n_queries == expected, (
+            f"Убедитесь, что страница `{url}` загружает посты вместе с "
+            "автором, категорией и местоположением: ожидалось "
+            f"{expected} запросов к БД, выполнено {n_queries}."
+        )
+
+
+@pytest.mark.parametrize(
+    ("client_fixture", "expected"),
+    [
+        ("unlogged_client", 3),
+        ("user_client", 5),
+    ],
+    ids=["anonymous", "author"],
+)
+def test_post_detail_query_count(
+        request, post_with_published_location, comment_to_a_post,
+        client_fixture, expected
+):
+    client = request.getfixturevalue(client_fixture)
+    n_queries = _count_page_queries(
+        client, f"/posts/{post_with_published_location.id}/"
+    )
+    assert n_queries == expected, (
+        "Убедитесь, что страница поста загружает пост вместе с автором, "
+        "категорией и местоположением одним запросом (ещё один - "
+        "дата изменения поста для ETag): ожидалось "
+        f"{expected} запросов к БД, выполнено {n_queries}."
+    )
+
+
+def test_hidden_post_detail_does_not_load_related(
+        mixer: Mixer, user, unlogged_client, django_assert_num_queries
+):
+    post = mixer.blend("blog.Post", author=user, is_published=False)
+    with django_assert_num_queries(1):
+        response = unlogged_client.get(f"/posts/{post.id}/")
+    assert response.status_code == 404, (
+        "Убедитесь, что снятый с публикации пост недоступен другим "
+        "пользователям."
+    )
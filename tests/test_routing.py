@@ -0,0 +1,78 @@
+import importlib
+
+import pytest
+from django.db import DatabaseError
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog.models import Post
+from blogicum.middleware import (READ_AFTER_WRITE_COOKIE,
+                                 ReadOnlyRoutingMiddleware)
+from blogicum.routers import ReadOnlyRouter
+
+
+def _routed_alias(request) -> tuple[str | None, HttpResponse]:
+    aliases = []
+
+    def view(request):
+        aliases.append(ReadOnlyRouter().db_for_read(Post))
+        return HttpResponse()
+
+    response = ReadOnlyRoutingMiddleware(view)(request)
+    return aliases[0], response
+
+
+def test_get_reads_from_read_only_alias():
+    alias, response = _routed_alias(RequestFactory().get("/"))
+    assert alias == "readonly", (
+        "Убедитесь, что чтение в GET-запросах идёт на псевдоним только "
+        "для чтения."
+    )
+    assert READ_AFTER_WRITE_COOKIE not in response.cookies
+    assert ReadOnlyRouter().db_for_read(Post) is None
+    assert ReadOnlyRouter().db_for_write(Post) == "default"
+
+
+@pytest.mark.parametrize("path", ["/posts/create/", "/admin/"])
+def test_writes_and_admin_use_primary(path):
+    factory = RequestFactory()
+    alias, response = _routed_alias(factory.post(path))
+    assert alias is None
+    assert response.cookies[READ_AFTER_WRITE_COOKIE]["max-age"] == 5
+    alias, _ = _routed_alias(factory.get("/admin/"))
+    assert alias is None
+
+
+def test_user_is_pinned_to_primary_after_write():
+    request = RequestFactory().get("/")
+    request.COOKIES[READ_AFTER_WRITE_COOKIE] = "1"
+    alias, _ = _routed_alias(request)
+    assert alias is None, (
+        "Убедитесь, что после записи пользователь некоторое время читает "
+        "из основной базы."
+    )
+
+
+@pytest.mark.django_db
+def test_read_only_alias_cannot_write(tmp_path, monkeypatch):
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "test")
+    production = importlib.import_module("blogicum.settings_production")
+    path = tmp_path / "db.sqlite3"
+    handler = ConnectionHandler({
+        "default": {**production.DATABASES["default"], "NAME": path},
+        "readonly": {
+            **production.DATABASES["readonly"],
+            "NAME": f"{path.as_uri()}?mode=ro",
+        },
+    })
+    try:
+        with handler["default"].cursor() as cursor:
+            cursor.execute("CREATE TABLE t (id integer)")
+        with handler["readonly"].cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM t")
+            assert cursor.fetchone() == (0,)
+            with pytest.raises(DatabaseError):
+                cursor.execute("INSERT INTO t VALUES (1)")
+    finally:
+        handler.close_all()
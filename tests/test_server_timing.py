@@ -0,0 +1,49 @@
+import logging
+import re
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+SERVER_TIMING_RE = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", '
+    r'tpl;dur=([\d.]+), total;dur=([\d.]+)'
+)
+
+
+def test_server_timing_header(post_with_published_location, unlogged_client):
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get("/")
+    match = SERVER_TIMING_RE.fullmatch(response["Server-Timing"])
+    assert match, (
+        "Убедитесь, что ответ содержит заголовок `Server-Timing` с числом "
+        "запросов и временем базы, шаблонов и всего запроса."
+    )
+    queries, templates, total = match.groups()
+    assert int(queries) == len(ctx.captured_queries)
+    assert 0 < float(templates) <= float(total)
+
+
+def test_server_timing_log_per_url(
+        post_with_published_location, unlogged_client, caplog
+):
+    caplog.set_level(logging.INFO, logger="blogicum.server_timing")
+    unlogged_client.get("/pages/about/")
+    assert not caplog.records
+    unlogged_client.get("/")
+    (record,) = caplog.records
+    assert record.view_name == "blog:index", (
+        "Убедитесь, что замеры страниц с LOG в `server_timing` из "
+        "`blog/urls.py` пишутся в лог."
+    )
+    assert record.status == 200
+    assert record.queries > 0
+
+
+def test_server_timing_can_be_disabled(unlogged_client):
+    with override_settings(SERVER_TIMING={"ENABLED": False}):
+        response = unlogged_client.get("/pages/about/")
+    assert not response.has_header("Server-Timing")
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_anonymous_page_does_not_touch_session(
+        post_with_published_location, unlogged_client
+):
+    with CaptureQueriesContext(connection) as ctx:
+        response = unlogged_client.get("/")
+    assert response.status_code == 200
+    session_queries = [
+        query["sql"] for query in ctx.captured_queries
+        if "django_session" in query["sql"]
+    ]
+    assert not session_queries, (
+        "Убедитесь, что запрос главной страницы без сессионной куки не "
+        "обращается к таблице сессий."
+    )
+    assert "Cookie" not in response.get("Vary", ""), (
+        "Убедитесь, что ответ на запрос без сессионной куки не содержит "
+        "`Vary: Cookie`."
+    )
+    assert not response.cookies
+
+
+def test_session_cookie_keeps_vary(post_with_published_location, user_client):
+    response = user_client.get("/")
+    assert "Cookie" in response["Vary"], (
+        "Убедитесь, что ответ авторизованному пользователю по-прежнему "
+        "содержит `Vary: Cookie`."
+    )
+
+
+def test_expired_sessions_are_deleted_in_batches():
+    now = timezone.now()
+    for i in range(5):
+        session = SessionStore()
+        session["n"] = i
+        session.create()
+    Session.objects.update(expire_date=now - timedelta(days=1))
+    alive = SessionStore()
+    alive.create()
+
+    out = StringIO()
+    with CaptureQueriesContext(connection) as ctx:
+        call_command("clear_expired_sessions", batch_size=2, stdout=out)
+    deletes = [
+        query for query in ctx.captured_queries
+        if query["sql"].startswith("DELETE")
+    ]
+    assert len(deletes) == 3, (
+        "Убедитесь, что команда `clear_expired_sessions` удаляет сессии "
+        "порциями размера `--batch-size`."
+    )
+    assert "Удалено сессий: 5" in out.getvalue()
+    assert list(Session.objects.values_list("pk", flat=True)) == [
+        alive.session_key
+    ], (
+        "Убедитесь, что команда `clear_expired_sessions` удаляет только "
+        "истёкшие сессии."
+    )
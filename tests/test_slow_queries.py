@@ -0,0 +1,97 @@
+import json
+import logging
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_slow_queries_are_logged_with_plan(
+        post_with_published_location, unlogged_client, caplog
+):
+    caplog.set_level(logging.WARNING, logger="blogicum.slow_queries")
+    with override_settings(SLOW_QUERIES={"THRESHOLD_MS": 0}):
+        unlogged_client.get(f"/posts/{post_with_published_location.id}/")
+    entries = [json.loads(record.getMessage()) for record in caplog.records]
+    assert entries, (
+        "Убедитесь, что запросы дольше порога `SLOW_QUERIES['THRESHOLD_MS']` "
+        "записываются в журнал."
+    )
+    entry = entries[0]
+    assert entry["view"] == "blog:post_detail"
+    assert entry["sql"].startswith("SELECT")
+    assert entry["plan"], (
+        "Убедитесь, что для медленных SELECT сохраняется EXPLAIN QUERY PLAN."
+    )
+    assert entry["source"] and all(
+        source.startswith("blog/") for source in entry["source"]
+    ), "Убедитесь, что стек запроса обрезан до кода `blog/`."
+
+
+def test_slow_queries_command_sums_by_sql(tmp_path):
+    log_file = tmp_path / "slow_queries.log"
+    entries = [
+        {"sql": "SELECT 1", "duration_ms": 150.0, "view": "blog:index",
+         "source": ["blog/views.py:1 in index"], "plan": ["SCAN t"]},
+        {"sql": "SELECT 1", "duration_ms": 250.0, "view": "blog:index",
+         "source": ["blog/views.py:1 in index"], "plan": ["SCAN t"]},
+        {"sql": "SELECT 2", "duration_ms": 300.0, "view": "blog:profile",
+         "source": [], "plan": None},
+    ]
+    log_file.write_text(
+        "".join(json.dumps(entry) + "\n" for entry in entries) + "мусор\n",
+        encoding="utf-8",
+    )
+    out = StringIO()
+    call_command("slow_queries", file=log_file, top=1, stdout=out)
+    output = out.getvalue()
+    assert "всего 400.0 мс, запросов 2" in output, (
+        "Убедитесь, что команда `slow_queries` суммирует время "
+        "одинаковых запросов и сортирует по нему."
+    )
+    assert "SELECT 2" not in output
+    assert "план: SCAN t" in output
+
+
+def test_slow_query_params_are_not_logged_by_default(
+        post_with_published_location, user_client, caplog
+):
+    caplog.set_level(logging.WARNING, logger="blogicum.slow_queries")
+
+    def logged_params():
+        caplog.clear()
+        user_client.get(f"/posts/{post_with_published_location.id}/")
+        return {
+            entry["sql"]: entry["params"]
+            for entry in map(json.loads, caplog.messages)
+        }
+
+    with override_settings(SLOW_QUERIES={"THRESHOLD_MS": 0}):
+        assert not any(logged_params().values()), (
+            "Убедитесь, что параметры запросов по умолчанию не пишутся "
+            "в журнал медленных запросов."
+        )
+    with override_settings(
+            SLOW_QUERIES={"THRESHOLD_MS": 0, "LOG_PARAMS": True}
+    ):
+        params = logged_params()
+    sensitive = [
+        sql for sql in params
+        if '"django_session"' in sql or '"auth_user"' in sql
+    ]
+    assert sensitive and not any(params[sql] for sql in sensitive), (
+        "Убедитесь, что параметры запросов к `django_session` и `auth_user` "
+        "не пишутся в журнал и с `LOG_PARAMS`."
+    )
+    assert any(
+        params[sql] for sql in params if sql not in sensitive
+    ), "Убедитесь, что с `LOG_PARAMS` параметры запросов пишутся в журнал."
+
+
+def test_slow_queries_command_requires_log_setting(settings):
+    del settings.SLOW_QUERY_LOG
+    with pytest.raises(CommandError, match="--file"):
+        call_command("slow_queries")
@@ -0,0 +1,78 @@
+import importlib
+
+import pytest
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from blog.warmup import warm_up_connection, warm_up_queries
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_production_pragmas_are_applied(tmp_path, monkeypatch):
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "test")
+    production = importlib.import_module("blogicum.settings_production")
+    handler = ConnectionHandler({
+        "default": {
+            **production.DATABASES["default"],
+            "NAME": tmp_path / "db.sqlite3",
+        },
+    })
+    connection = handler["default"]
+    try:
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ("journal_mode", "synchronous", "busy_timeout",
+                         "temp_store"):
+                cursor.execute(f"PRAGMA {name}")
+                pragmas[name] = cursor.fetchone()[0]
+    finally:
+        connection.close()
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "busy_timeout": 5000,
+        "temp_store": 2,
+    }, (
+        "Убедитесь, что PRAGMA из `SQLITE_PRAGMAS` применяются к каждому "
+        "новому соединению с базой."
+    )
+
+
+def test_new_connection_is_warmed_up(post_with_published_location):
+    with override_settings(BLOG_WARM_UP_CONNECTIONS=False):
+        with CaptureQueriesContext(connection) as ctx:
+            warm_up_connection(sender=None, connection=connection)
+    assert not ctx.captured_queries
+
+    with override_settings(BLOG_WARM_UP_CONNECTIONS=True):
+        with CaptureQueriesContext(connection) as ctx:
+            warm_up_connection(sender=None, connection=connection)
+    assert len(ctx.captured_queries) == len(warm_up_queries("default")), (
+        "Убедитесь, что при включённом BLOG_WARM_UP_CONNECTIONS новое "
+        "соединение выполняет запросы прогрева."
+    )
+
+
+def test_warm_up_runs_post_detail_sql(
+        post_with_published_location, unlogged_client
+):
+    def recorder(sqls: list[str]):
+        def record(execute, sql, params, many, context):
+            sqls.append(sql)
+            return execute(sql, params, many, context)
+        return record
+
+    warm_up_sql, page_sql = [], []
+    with connection.execute_wrapper(recorder(warm_up_sql)):
+        for query in warm_up_queries("default"):
+            query()
+    with connection.execute_wrapper(recorder(page_sql)):
+        unlogged_client.get(f"/posts/{post_with_published_location.id}/")
+    assert set(warm_up_sql[-2:]) <= set(page_sql), (
+        "Убедитесь, что прогрев выполняет тот же SQL, что и страница "
+        "поста: sqlite3 кеширует подготовленные выражения по тексту "
+        "запроса."
+    )
@@ -0,0 +1,52 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+RAW_TEXT = "Первая строка\n<b>вторая</b> & третья"
+HTML = "Первая строка<br>&lt;b&gt;вторая&lt;/b&gt; &amp; третья"
+
+
+def test_post_html_is_rendered_on_save(
+        post_with_published_location, unlogged_client
+):
+    post = post_with_published_location
+    post.text = RAW_TEXT
+    post.save()
+    assert post.text_html == HTML
+    response = unlogged_client.get(f"/posts/{post.id}/")
+    assert HTML in response.content.decode(), (
+        "Убедитесь, что страница поста выводит сохранённый HTML текста."
+    )
+
+
+def test_comment_html_is_updated_on_edit(
+        mixer: Mixer, post_with_published_location, user, user_client
+):
+    post = post_with_published_location
+    comment = mixer.blend("blog.Comment", post=post, author=user)
+    response = user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/", {"text": RAW_TEXT}
+    )
+    assert response.status_code == 302
+    comment.refresh_from_db()
+    assert comment.text_html == HTML, (
+        "Убедитесь, что HTML комментария пересчитывается при его "
+        "редактировании."
+    )
+    response = user_client.get(f"/posts/{post.id}/")
+    assert HTML in response.content.decode()
+
+
+def test_backfill_text_html(comment_to_a_post):
+    Post.objects.update(text_html="")
+    Comment.objects.update(text_html="")
+    call_command("backfill_text_html", stdout=StringIO())
+    comment_to_a_post.refresh_from_db()
+    assert comment_to_a_post.text_html
+    assert not Post.objects.filter(text_html="").exists()
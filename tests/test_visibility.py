@@ -0,0 +1,102 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_visibility_is_computed_on_save(
+        post_with_published_location, future_posts,
+        posts_with_unpublished_category
+):
+    assert post_with_published_location.is_visible
+    assert not any(post.is_visible for post in future_posts), (
+        "Убедитесь, что пост с датой публикации в будущем не отмечается "
+        "видимым при сохранении."
+    )
+    assert not any(post.is_visible for post in posts_with_unpublished_category)
+
+    post_with_published_location.is_published = False
+    post_with_published_location.save(update_fields=["is_published"])
+    post_with_published_location.refresh_from_db()
+    assert not post_with_published_location.is_visible, (
+        "Убедитесь, что флаг is_visible пересчитывается и при сохранении "
+        "с update_fields."
+    )
+
+
+def test_category_unpublish_is_one_update(
+        mixer: Mixer, user, published_category, django_assert_num_queries
+):
+    mixer.cycle(5).blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True,
+    )
+    published_category.is_published = False
+    with django_assert_num_queries(2):
+        published_category.save()
+    assert not Post.objects.published().exists(), (
+        "Убедитесь, что снятие категории с публикации одним запросом "
+        "скрывает все её посты."
+    )
+
+    published_category.is_published = True
+    published_category.save()
+    assert Post.objects.published().count() == 5
+
+
+@pytest.mark.page_cache
+def test_publish_scheduled_flips_due_posts(
+        mixer: Mixer, user, published_category, post_with_published_location,
+        unlogged_client
+):
+    post = mixer.blend(
+        "blog.Post", author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1),
+    )
+    unlogged_client.get("/")
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(minutes=1)
+    )
+
+    out = StringIO()
+    call_command("publish_scheduled", stdout=out)
+    assert "Опубликовано постов: 1" in out.getvalue()
+    response = unlogged_client.get("/")
+    assert post in response.context["page_obj"], (
+        "Убедитесь, что команда `publish_scheduled` открывает посты с "
+        "наступившей датой публикации и сбрасывает кеш списков."
+    )
+
+
+@pytest.mark.page_cache
+def test_visibility_repair_invalidates_post_and_category_pages(
+        post_with_published_location, published_category, unlogged_client
+):
+    post = post_with_published_location
+    category_url = f"/category/{published_category.slug}/"
+    post_url = f"/posts/{post.id}/"
+    assert post.title in unlogged_client.get(category_url).content.decode()
+    assert unlogged_client.get(post_url).status_code == 200
+    # Флаг разошёлся с данными, например после правки базы вручную
+    Post.objects.filter(pk=post.pk).update(is_published=False)
+
+    out = StringIO()
+    call_command("publish_scheduled", recheck_all=True, stdout=out)
+    assert "Исправлено флагов видимости: 1" in out.getvalue()
+    assert post.title not in unlogged_client.get(
+        category_url
+    ).content.decode(), (
+        "Убедитесь, что `publish_scheduled --all` сбрасывает кеш страниц "
+        "категорий, в которых изменилась видимость постов."
+    )
+    assert unlogged_client.get(post_url).status_code == 404, (
+        "Убедитесь, что `publish_scheduled --all` сбрасывает кеш страниц "
+        "постов, видимость которых изменилась."
+    )
@@ -0,0 +1,108 @@
+import threading
+
+import pytest
+from django.test import override_settings
+
+from blog.cache import get_tag_versions
+from blog.models import Comment
+from blog.write_queue import WriteQueue, get_write_queue
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def write_queue():
+    write_queue = WriteQueue(max_size=100, batch_size=10)
+    yield write_queue
+    write_queue.stop()
+
+
+def test_writes_from_threads_are_serialized(
+        user, post_with_published_location, write_queue
+):
+    post = post_with_published_location
+    results = []
+
+    def comment(i: int) -> None:
+        future = write_queue.submit(
+            lambda: Comment.objects.create(
+                post=post, author=user, text=f"Комментарий {i}"
+            )
+        )
+        results.append(future.result(timeout=10))
+
+    threads = [threading.Thread(target=comment, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 20
+    post.refresh_from_db()
+    assert post.comments.count() == post.comment_count == 20, (
+        "Убедитесь, что все записи из очереди сохраняются вместе с "
+        "обновлением счётчика комментариев."
+    )
+
+
+def test_failed_write_does_not_roll_back_batch(
+        user, post_with_published_location, write_queue
+):
+    def fail():
+        Comment.objects.create(
+            post=post_with_published_location, author=user, text="Откат"
+        )
+        raise ValueError("ошибка записи")
+
+    futures = [
+        write_queue.submit(fail),
+        write_queue.submit(lambda: Comment.objects.create(
+            post=post_with_published_location, author=user, text="Запись"
+        )),
+    ]
+    with pytest.raises(ValueError):
+        futures[0].result(timeout=10)
+    assert futures[1].result(timeout=10).text == "Запись"
+    assert list(Comment.objects.values_list("text", flat=True)) == [
+        "Запись"
+    ], (
+        "Убедитесь, что ошибка одной записи откатывает только её, "
+        "а не всю пачку."
+    )
+
+
+def test_pages_are_invalidated_after_batch_commit(
+        user, post_with_published_location, write_queue
+):
+    post = post_with_published_location
+    tag = f"post:{post.pk}"
+    version = get_tag_versions([tag])[tag]
+    versions_in_batch = []
+
+    def comment():
+        Comment.objects.create(post=post, author=user, text="Комментарий")
+        versions_in_batch.append(get_tag_versions([tag])[tag])
+
+    write_queue.submit(comment).result(timeout=10)
+    assert versions_in_batch == [version], (
+        "Убедитесь, что кеш страниц сбрасывается только после фиксации "
+        "пачки записей, а не внутри её транзакции."
+    )
+    assert get_tag_versions([tag])[tag] != version, (
+        "Убедитесь, что к моменту ответа на запись кеш страниц уже сброшен."
+    )
+
+
+def test_comment_view_uses_write_queue(
+        post_with_published_location, user_client
+):
+    post = post_with_published_location
+    with override_settings(BLOG_WRITE_QUEUE={"ENABLED": True}):
+        try:
+            response = user_client.post(
+                f"/posts/{post.id}/comment/", {"text": "Через очередь"}
+            )
+        finally:
+            get_write_queue().stop()
+    assert response.status_code == 302
+    assert post.comments.get().text == "Через очередь"